@@ -10,9 +10,9 @@ from pathlib import Path
 from typing import AsyncGenerator
 
 import yaml
-import anthropic
 
 from seo_memory import get_recent_history
+from utils.anthropic_client import get_anthropic_client
 
 async def _get_clickup_context(client_slug: str) -> str:
     """Pull ClickUp task completion data for audit context."""
@@ -835,7 +835,7 @@ async def execute(
     # Use higher token limits for commands that produce longer output
     token_limit = 16000 if command in ('weekly-plan', 'workload', 'monthly-plan') else 8192
 
-    client = anthropic.AsyncAnthropic()
+    client = get_anthropic_client()
 
     async with client.messages.stream(
         model="claude-sonnet-4-20250514",
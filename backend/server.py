@@ -43,6 +43,7 @@ from workflows.seo_content_audit import run_seo_content_audit
 from workflows.technical_seo_review import run_technical_seo_review
 from workflows.programmatic_seo_strategy import run_programmatic_seo_strategy
 from workflows.competitor_seo_analysis import run_competitor_seo_analysis
+from utils.anthropic_client import get_anthropic_client
 from utils.docx_generator import generate_docx
 from utils.db import (
     init_db, save_job, update_docx_path, update_job_content,
@@ -102,7 +103,7 @@ app.add_middleware(
 init_db()
 
 # ── Pipeline engine setup ─────────────────────────────────
-_anthropic_client = anthropic.AsyncAnthropic()
+_anthropic_client = get_anthropic_client()
 _memory_store = ClientMemoryStore(db_connect)
 _pipeline_engine = PipelineEngine(_anthropic_client, db_connect, _memory_store)
 
@@ -296,7 +297,7 @@ async def onboard_client_brand(client_id: int, body: OnboardRequest):
     from pipeline.brand_extractor import extract_brand
     from pipeline.brand_memory import save_brand_to_memory
 
-    brand_data = await extract_brand(domain, anthropic.AsyncAnthropic())
+    brand_data = await extract_brand(domain, get_anthropic_client())
     if not brand_data.get("color_palette"):
         raise HTTPException(status_code=422, detail="Brand extraction returned no color data")
 
@@ -359,7 +360,7 @@ async def research_client(client_id: int, body: ResearchRequest = ResearchReques
     if not api_key:
         raise HTTPException(status_code=500, detail="ANTHROPIC_API_KEY not configured")
 
-    anthropic_client = anthropic.AsyncAnthropic(api_key=api_key)
+    anthropic_client = get_anthropic_client()
 
     async def research_stream():
         from pipeline.client_research_agent import build_client_brain_streaming
@@ -503,7 +504,7 @@ async def discover_cities(req: DiscoverCitiesRequest):
         raise HTTPException(status_code=500, detail="ANTHROPIC_API_KEY not configured")
 
     city_name = req.city.split(",")[0].strip()
-    client = anthropic.AsyncAnthropic(api_key=api_key)
+    client = get_anthropic_client()
 
     response = await client.messages.create(
         model="claude-haiku-4-5-20251001",
@@ -542,7 +543,7 @@ async def run_workflow(req: WorkflowRequest):
         raise HTTPException(status_code=400, detail=f"Unknown workflow: {req.workflow_id}")
 
     job_id = str(uuid.uuid4())[:8]
-    client = anthropic.AsyncAnthropic(api_key=api_key)
+    client = get_anthropic_client()
 
     async def event_stream():
         full_content: list[str] = []
@@ -929,7 +930,7 @@ async def edit_document(req: EditDocumentRequest):
     if not api_key:
         raise HTTPException(status_code=500, detail="ANTHROPIC_API_KEY not configured")
 
-    client = anthropic.AsyncAnthropic(api_key=api_key)
+    client = get_anthropic_client()
 
     async def event_stream():
         edited_content: list[str] = []
@@ -2004,7 +2005,7 @@ async def run_auditpilot(req: AuditRequest):
     from agents.auditpilot.engine import run_audit
 
     job_id = str(uuid.uuid4())[:8]
-    audit_client = anthropic.AsyncAnthropic(api_key=api_key)
+    audit_client = get_anthropic_client()
     display_name = req.prospect_name or req.client_name or req.domain
 
     async def event_stream():
@@ -2090,7 +2091,7 @@ async def pilot_briefing():
 
     from agents.pilot.briefing import generate_briefing
 
-    pilot_client = anthropic.AsyncAnthropic(api_key=api_key)
+    pilot_client = get_anthropic_client()
 
     async def event_stream():
         try:
@@ -2116,7 +2117,7 @@ async def pilot_escalation():
 
     from agents.pilot.escalation import run_escalation_check
 
-    pilot_client = anthropic.AsyncAnthropic(api_key=api_key)
+    pilot_client = get_anthropic_client()
 
     async def event_stream():
         try:
@@ -2156,7 +2157,7 @@ async def run_qapilot(req: QARequest):
     from agents.qapilot.engine import run_qa
 
     job_id = str(uuid.uuid4())[:8]
-    qa_client = anthropic.AsyncAnthropic(api_key=api_key)
+    qa_client = get_anthropic_client()
     display_name = req.client_name or "QA Review"
 
     async def event_stream():
@@ -2246,7 +2247,7 @@ async def run_strategypilot(req: StrategyRequest):
     from agents.strategypilot.engine import run_strategy
 
     job_id = str(uuid.uuid4())[:8]
-    strat_client = anthropic.AsyncAnthropic(api_key=api_key)
+    strat_client = get_anthropic_client()
     display_name = req.business_name or req.client_name or req.domain
 
     async def event_stream():
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Workflows import their helpers as top-level packages (utils.*, workflows.*)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+import utils.dataforseo as dataforseo
+import utils.searchatlas as searchatlas
+from utils.http_client import request_timeout
+
+
+class _FakeResponse:
+    def __init__(self, body):
+        self._body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._body
+
+
+class _SlowClient:
+    """Stands in for the pooled httpx client: every post takes `delay` seconds."""
+
+    def __init__(self, delay, body):
+        self._delay = delay
+        self._body = body
+
+    async def post(self, *args, **kwargs):
+        await asyncio.sleep(self._delay)
+        return _FakeResponse(self._body)
+
+
+def _serialised(module, monkeypatch, delay, body):
+    """One in-flight request at a time, each taking `delay` seconds."""
+    monkeypatch.setattr(module, "get_http_client", lambda: _SlowClient(delay, body))
+
+
+async def _capped(seconds, coro):
+    with request_timeout(seconds):
+        return await coro
+
+
+def test_search_atlas_queue_wait_is_not_timed(monkeypatch):
+    monkeypatch.setenv("SEARCHATLAS_API_KEY", "key")
+    monkeypatch.setattr(searchatlas, "SA_MAX_CONCURRENCY", 1)
+    _serialised(searchatlas, monkeypatch, 0.1, {"result": {"content": [{"text": "ok"}]}})
+
+    async def run():
+        # The third call waits ~0.2s for its slot; only its own 0.1s request counts
+        return await asyncio.gather(*(_capped(0.15, searchatlas.sa_call("T", "op")) for _ in range(3)))
+
+    assert asyncio.run(run()) == ["ok", "ok", "ok"]
+
+
+def test_dataforseo_queue_wait_is_not_timed(monkeypatch):
+    monkeypatch.setenv("DATAFORSEO_LOGIN", "login")
+    monkeypatch.setenv("DATAFORSEO_PASSWORD", "password")
+    monkeypatch.setattr(dataforseo, "DFS_MAX_CONCURRENCY", 1)
+    body = {"status_code": 20000, "tasks": [{"status_code": 20000}]}
+    _serialised(dataforseo, monkeypatch, 0.1, body)
+
+    async def run():
+        return await asyncio.gather(*(_capped(0.15, dataforseo._dfs_post("e", [{}])) for _ in range(3)))
+
+    assert asyncio.run(run()) == [body] * 3
+
+
+def test_slow_request_still_times_out(monkeypatch):
+    monkeypatch.setenv("SEARCHATLAS_API_KEY", "key")
+    monkeypatch.setenv("DATAFORSEO_LOGIN", "login")
+    monkeypatch.setenv("DATAFORSEO_PASSWORD", "password")
+    _serialised(searchatlas, monkeypatch, 0.5, {"result": {}})
+    _serialised(dataforseo, monkeypatch, 0.5, {"status_code": 20000, "tasks": [{}]})
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(_capped(0.05, searchatlas.sa_call("T", "op")))
+    with pytest.raises(TimeoutError):
+        asyncio.run(_capped(0.05, dataforseo._dfs_post("e", [{}])))
@@ -0,0 +1,18 @@
+from workflows.prospect_audit import _build_roi_table
+
+
+def test_job_value_parses_dollar_amount():
+    conservative, _ = _build_roi_table(4000, "$1,200/job", "plumbing")
+    assert "| Avg Job Value | $1,200 |" in conservative
+
+
+def test_job_value_parses_non_latin1_currency():
+    conservative, aggressive = _build_roi_table(4000, "€1,200", "plumbing")
+    assert "| Avg Job Value | $1,200 |" in conservative
+    assert "| Avg Job Value | $1,200 |" in aggressive
+
+
+def test_job_value_defaults_when_blank_or_unparseable():
+    for raw in ("", "call for quote"):
+        conservative, _ = _build_roi_table(4000, raw, "plumbing")
+        assert "| Avg Job Value | $350 |" in conservative
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from utils.workflow_helpers import clean_content
+from workflows.seo_blog_post import run_seo_blog_post
+
+
+class _FakeStream:
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        for chunk in self._chunks:
+            yield chunk
+
+
+class _FakeClient:
+    """Stands in for AsyncAnthropic: messages.stream() replays fixed chunks."""
+
+    def __init__(self, chunks):
+        self.messages = self
+        self._chunks = chunks
+
+    def stream(self, **kwargs):
+        return _FakeStream(self._chunks)
+
+
+def _run(chunks):
+    async def collect():
+        out = []
+        gen = run_seo_blog_post(_FakeClient(chunks), {"keyword": "k", "quiet": True}, "", "Acme")
+        async for text in gen:
+            out.append(text)
+        return "".join(out)
+    return asyncio.run(collect())
+
+
+def test_short_label_headline_is_rewritten_once():
+    text = "## Tips: Our Five Best Ideas Today: read more\n"
+    assert clean_content(text) == "## Our Five Best Ideas Today: read more in Tips\n"
+
+
+def test_long_label_headline_keeps_rest():
+    text = "### Five Ways To Save Money Today: and more: tips\n"
+    assert clean_content(text) == "### and more: tips\n"
+
+
+def test_streamed_post_rewrites_two_colon_headline_once():
+    out = _run(["# Title\n", "## Tips: Our Five Best ", "Ideas Today: read more\n", "Body text.\n"])
+    assert "## Our Five Best Ideas Today: read more in Tips\n" in out
+    assert "## read more in Tips" not in out
+
+
+def test_fenced_headline_is_left_alone():
+    text = "```\n## Note: keep this\n```\n"
+    assert clean_content(text) == text
+
+
+def test_long_unclosed_fence_streams_in_linear_time():
+    # No newline inside an open fence is a safe split, so the whole tail stays
+    # buffered; rescanning it per chunk used to take minutes at this size
+    text = "# Title\n```python\n" + "x = 1\n" * 40_000
+    chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+    started = time.monotonic()
+    out = _run(chunks)
+    assert time.monotonic() - started < 5
+    assert out == clean_content(text)
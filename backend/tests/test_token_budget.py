@@ -0,0 +1,39 @@
+import asyncio
+
+import anthropic
+import httpx
+
+import utils.token_budget as token_budget
+
+
+class _FailingCounter:
+    """Stands in for AsyncAnthropic: every count_tokens call raises."""
+
+    def __init__(self):
+        self.messages = self
+        self.calls = 0
+
+    async def count_tokens(self, **kwargs):
+        self.calls += 1
+        raise anthropic.APIConnectionError(request=httpx.Request("POST", "https://api.anthropic.com"))
+
+
+def test_failed_count_is_not_retried_on_every_run():
+    client = _FailingCounter()
+    prompt = "static system prompt " * 10
+
+    async def run():
+        return [await token_budget.system_token_count(client, "m", prompt) for _ in range(3)]
+
+    assert asyncio.run(run()) == [token_budget.estimate_tokens(prompt)] * 3
+    assert client.calls == 1
+
+
+def test_count_is_retried_after_the_backoff(monkeypatch):
+    client = _FailingCounter()
+    prompt = "another static prompt"
+    asyncio.run(token_budget.system_token_count(client, "m", prompt))
+    later = token_budget.time.monotonic() + token_budget.COUNT_RETRY_SECONDS + 1
+    monkeypatch.setattr(token_budget.time, "monotonic", lambda: later)
+    asyncio.run(token_budget.system_token_count(client, "m", prompt))
+    assert client.calls == 2
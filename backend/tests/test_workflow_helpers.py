@@ -0,0 +1,99 @@
+import asyncio
+
+from utils.workflow_helpers import CleanSplitter, coalesce_text
+
+
+async def _drip(steps):
+    """Yield text after the given delays: [(seconds, text), ...]."""
+    for delay, text in steps:
+        await asyncio.sleep(delay)
+        yield text
+
+
+def _collect(steps, **kwargs):
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        return [(round(loop.time() - start, 2), piece) async for piece in coalesce_text(_drip(steps), **kwargs)]
+    return asyncio.run(run())
+
+
+def test_small_chunks_are_joined():
+    pieces = _collect([(0, "a"), (0, "b"), (0, "c")], max_chars=256, max_delay=1.0)
+    assert [p for _, p in pieces] == ["abc"]
+
+
+def test_size_limit_flushes_immediately():
+    pieces = _collect([(0, "ab"), (0, "cd"), (0, "e")], max_chars=4, max_delay=1.0)
+    assert [p for _, p in pieces] == ["abcd", "e"]
+
+
+def test_buffer_flushes_during_a_model_pause():
+    pieces = _collect([(0, "head"), (0.5, "tail")], max_chars=256, max_delay=0.05)
+    assert [p for _, p in pieces] == ["head", "tail"]
+    # "head" went out on the timer, well before the next delta arrived
+    assert pieces[0][0] < 0.3
+
+
+def test_buffered_text_is_flushed_before_a_source_error():
+    class StreamBroke(Exception):
+        pass
+
+    async def failing():
+        yield "one "
+        yield "two"
+        raise StreamBroke()
+
+    async def run():
+        pieces = []
+        try:
+            async for piece in coalesce_text(failing(), max_chars=256, max_delay=1.0):
+                pieces.append(piece)
+        except StreamBroke:
+            return pieces
+        raise AssertionError("source error was swallowed")
+
+    assert asyncio.run(run()) == ["one two"]
+
+
+def test_closing_early_cancels_the_pending_read():
+    cancelled = asyncio.Event()
+
+    async def stalls():
+        yield "ab"
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        yield "never"
+
+    async def run():
+        pieces = coalesce_text(stalls(), max_chars=256, max_delay=0.05)
+        # "ab" goes out on the timer while the next read is still waiting
+        assert await anext(pieces) == "ab"
+        await pieces.aclose()
+        await asyncio.wait_for(cancelled.wait(), 1.0)
+
+    asyncio.run(run())
+
+
+def _split(chunks):
+    splitter = CleanSplitter()
+    pieces = [splitter.feed(chunk) for chunk in chunks]
+    return [piece for piece in pieces if piece] + [splitter.flush()]
+
+
+def test_splitter_releases_complete_lines():
+    assert _split(["# Title\n", "Intro", " text\n", "x\n"]) == ["# Title\n", "Intro text\n", "x\n"]
+
+
+def test_splitter_holds_open_bold_and_dash_boundaries():
+    # An open **bold** pair and a line ending in an em dash both hold the newline back
+    assert _split(["**Bold\n", "still bold**\n", "x\n"]) == ["**Bold\nstill bold**\n", "x\n"]
+    assert _split(["Ends with —\n", "next\n", "x\n"]) == ["Ends with —\nnext\n", "x\n"]
+
+
+def test_splitter_keeps_fences_whole():
+    chunks = ["```\n", "## A: b\n", "```\n", "after\n", "x\n"]
+    assert _split(chunks) == ["```\n## A: b\n```\n", "after\n", "x\n"]
@@ -0,0 +1,57 @@
+"""
+Shared Anthropic client — one AsyncAnthropic per process for every workflow.
+
+Constructing a fresh client per request also builds a fresh httpx pool, so
+each workflow run paid a new TCP + TLS handshake to api.anthropic.com.
+get_anthropic_client() builds the client lazily on first use (after env vars
+are loaded) and hands back the same instance, keeping connections alive
+across concurrent and back-to-back generations.
+
+Workflow runners take an optional client and call resolve_client(), so
+callers without one of their own share the same pooled instance.
+
+Usage:
+    from utils.anthropic_client import get_anthropic_client, resolve_client
+    client = get_anthropic_client()
+    client = resolve_client(client)  # inside a runner whose client may be None
+"""
+
+import os
+from typing import Optional
+
+import anthropic
+import httpx
+
+_client: Optional[anthropic.AsyncAnthropic] = None
+
+
+def _pool_limits() -> httpx.Limits:
+    """
+    The SDK's default pool limits, with ANTHROPIC_MAX_CONNECTIONS overriding
+    the connection cap. Every streaming workflow holds one connection for
+    minutes, so the cap is effectively a ceiling on concurrent generations;
+    runs past it wait on the pool (and can time out) instead of streaming.
+    """
+    default = anthropic.DEFAULT_CONNECTION_LIMITS
+    max_connections = int(os.environ.get("ANTHROPIC_MAX_CONNECTIONS", default.max_connections))
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=min(default.max_keepalive_connections, max_connections),
+        keepalive_expiry=default.keepalive_expiry,
+    )
+
+
+def get_anthropic_client() -> anthropic.AsyncAnthropic:
+    """Return the process-wide AsyncAnthropic client, creating it on first call."""
+    global _client
+    if _client is None:
+        _client = anthropic.AsyncAnthropic(
+            api_key=os.environ.get("ANTHROPIC_API_KEY"),
+            http_client=anthropic.DefaultAsyncHttpxClient(limits=_pool_limits()),
+        )
+    return _client
+
+
+def resolve_client(client: Optional[anthropic.AsyncAnthropic]) -> anthropic.AsyncAnthropic:
+    """The caller's own client, or the process-wide one when it passed None."""
+    return client or get_anthropic_client()
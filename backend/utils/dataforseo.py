@@ -11,8 +11,9 @@ Core functions (live, pay-per-result ~$0.002 each):
   DataForSEO Labs:
     get_domain_ranked_keywords() — keywords a domain currently ranks for + volumes
     get_bulk_keyword_difficulty() — keyword difficulty scores (0-100)
+    get_bulk_domain_rank_overview() — traffic / keyword stats for several domains, one call
   Competitor profiles:
-    get_competitor_sa_profiles() — SA organic/backlink data for competitor domains
+    get_competitor_sa_profile()  — SA organic/backlink data for one competitor domain
 
 Required env vars:
     DATAFORSEO_LOGIN      your DataForSEO account email
@@ -45,14 +46,17 @@ Full DataForSEO API capability map (see CLAUDE.md for agent architecture):
 import os
 import asyncio
 import base64
-import httpx
 from urllib.parse import urlparse
 from typing import Optional
 
+from utils.http_client import get_http_client, get_semaphore, request_deadline
 from utils.searchatlas import sa_call
 
 DFS_BASE = "https://api.dataforseo.com/v3"
 
+# Max in-flight DataForSEO requests across all concurrent workflows
+DFS_MAX_CONCURRENCY = int(os.environ.get("DFS_MAX_CONCURRENCY", "20"))
+
 
 # ── Auth ─────────────────────────────────────────────────────────────────────
 
@@ -82,19 +86,21 @@ def _domain_from_url(url: str) -> str:
 async def _dfs_post(endpoint: str, payload: list[dict]) -> dict:
     """
     Make a single DataForSEO API call.
-    Raises ValueError on API-level errors, httpx.HTTPError on transport errors.
+    Raises ValueError on API-level errors, httpx.HTTPError on transport errors,
+    and TimeoutError if the request outlasts the caller's request_timeout().
     """
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.post(
-            f"{DFS_BASE}/{endpoint}",
-            headers={
-                "Authorization": _auth_header(),
-                "Content-Type": "application/json",
-            },
-            json=payload,
-        )
-        resp.raise_for_status()
-        data = resp.json()
+    async with get_semaphore("dataforseo", DFS_MAX_CONCURRENCY):
+        async with request_deadline():
+            resp = await get_http_client().post(
+                f"{DFS_BASE}/{endpoint}",
+                headers={
+                    "Authorization": _auth_header(),
+                    "Content-Type": "application/json",
+                },
+                json=payload,
+            )
+    resp.raise_for_status()
+    data = resp.json()
 
     # DataForSEO wraps everything in a status code — 20000 = success
     if data.get("status_code", 20000) != 20000:
@@ -366,28 +372,62 @@ async def get_domain_rank_overview(
             "location_name": location_name,
             "language_name": "English",
         }])
+        return _parse_rank_overview(domain, (data.get("tasks") or [None])[0])
+    except Exception:
+        return {"domain": domain, "keywords": 0, "etv": 0, "etv_cost": 0}
 
-        try:
-            items = data["tasks"][0]["result"][0]["items"] or []
-        except (KeyError, IndexError, TypeError):
-            return {"domain": domain, "keywords": 0, "etv": 0, "etv_cost": 0}
 
-        if not items:
-            return {"domain": domain, "keywords": 0, "etv": 0, "etv_cost": 0}
+async def get_bulk_domain_rank_overview(
+    domains: list[str],
+    location_name: str,
+) -> dict[str, dict]:
+    """
+    get_domain_rank_overview() for several domains in one POST — one task per
+    domain in the tasks array, so a single round trip covers the whole batch.
 
-        item = items[0]
-        metrics = item.get("metrics") or {}
-        organic = metrics.get("organic") or {}
+    Returns:
+        dict keyed by domain → same shape as get_domain_rank_overview()
+        (zeroed stats for any domain whose task failed)
+    """
+    domains = list(dict.fromkeys(domains))
+    if not domains:
+        return {}
 
-        return {
-            "domain":    domain,
-            "keywords":  organic.get("count", 0) or 0,
-            "etv":       round(organic.get("etv", 0) or 0, 0),
-            "etv_cost":  round(organic.get("estimated_paid_traffic_cost", 0) or 0, 0),
-        }
+    try:
+        data = await _dfs_post("dataforseo_labs/google/domain_rank_overview/live", [
+            {"target": d, "location_name": location_name, "language_name": "English"}
+            for d in domains
+        ])
+        tasks = data.get("tasks") or []
     except Exception:
+        tasks = []
+
+    # Tasks come back in request order, one per target
+    tasks = tasks + [None] * (len(domains) - len(tasks))
+    return {d: _parse_rank_overview(d, task) for d, task in zip(domains, tasks)}
+
+
+def _parse_rank_overview(domain: str, task: Optional[dict]) -> dict:
+    """Pull organic keyword count / traffic / value out of one domain_rank_overview task."""
+    try:
+        items = task["result"][0]["items"] or []
+    except (KeyError, IndexError, TypeError):
+        items = []
+
+    if not items:
         return {"domain": domain, "keywords": 0, "etv": 0, "etv_cost": 0}
 
+    item = items[0]
+    metrics = item.get("metrics") or {}
+    organic = metrics.get("organic") or {}
+
+    return {
+        "domain":    domain,
+        "keywords":  organic.get("count", 0) or 0,
+        "etv":       round(organic.get("etv", 0) or 0, 0),
+        "etv_cost":  round(organic.get("estimated_paid_traffic_cost", 0) or 0, 0),
+    }
+
 
 # ── Combined competitor research ──────────────────────────────────────────────
 
@@ -420,24 +460,27 @@ async def research_competitors(
     if isinstance(organic_result, Exception):
         organic_result = []
 
-    # Deduplicate domains across both lists for Search Atlas lookups
-    seen: set[str] = set()
-    all_domains: list[str] = []
-    for item in (maps_result + organic_result):
-        d = item.get("domain", "").strip().lower()
-        if d and d not in seen:
-            seen.add(d)
-            all_domains.append(d)
-
     return {
         "maps": maps_result,
         "organic": organic_result,
-        "all_domains": all_domains[:8],  # cap at 8 to keep SA calls manageable
+        "all_domains": competitor_domains(maps_result + organic_result)[:8],  # cap at 8 to keep SA calls manageable
         "keyword": keyword,
         "location": location_name,
     }
 
 
+def competitor_domains(results: list[dict]) -> list[str]:
+    """Deduplicated, lowercased competitor domains from SERP results, in result order."""
+    seen: set[str] = set()
+    domains: list[str] = []
+    for item in results:
+        d = item.get("domain", "").strip().lower()
+        if d and d not in seen:
+            seen.add(d)
+            domains.append(d)
+    return domains
+
+
 # ── Search Atlas profiles for each competitor ─────────────────────────────────
 
 async def get_competitor_sa_profile(domain: str) -> dict[str, str]:
@@ -466,29 +509,6 @@ async def get_competitor_sa_profile(domain: str) -> dict[str, str]:
     return {"domain": domain, **dict(results)}
 
 
-async def get_competitor_sa_profiles(domains: list[str]) -> list[dict]:
-    """
-    Pull SA data for a list of competitor domains in parallel.
-    Returns list of profile dicts ordered by input list.
-    """
-    if not domains:
-        return []
-
-    profiles = await asyncio.gather(
-        *[get_competitor_sa_profile(d) for d in domains],
-        return_exceptions=True,
-    )
-
-    results = []
-    for domain, profile in zip(domains, profiles):
-        if isinstance(profile, Exception):
-            results.append({"domain": domain, "keywords": "Data unavailable", "backlinks": "Data unavailable"})
-        else:
-            results.append(profile)
-
-    return results
-
-
 # ── Formatting helpers for Claude prompts ────────────────────────────────────
 
 def format_maps_competitors(results: list[dict]) -> str:
@@ -603,14 +623,15 @@ def format_domain_ranked_keywords(data: list[dict]) -> str:
     if not data:
         return "No ranked keyword data available from DataForSEO Labs."
 
+    rows = [
+        (kw.get("rank", "?"), kw["keyword"], kw.get("search_volume") or 0, kw.get("traffic_estimate") or 0)
+        for kw in data[:20]
+    ]
     lines = ["Domain Ranked Keywords — DataForSEO Labs (independent data source):\n"]
-    for kw in data[:20]:
-        vol     = kw.get("search_volume") or 0
-        rank    = kw.get("rank", "?")
-        traffic = kw.get("traffic_estimate") or 0
-        lines.append(
-            f"  #{rank}: \"{kw['keyword']}\" — {vol:,}/mo search vol, ~{traffic:.0f} est. monthly visits"
-        )
+    lines.extend(
+        f"  #{rank}: \"{keyword}\" — {vol:,}/mo search vol, ~{traffic:.0f} est. monthly visits"
+        for rank, keyword, vol, traffic in rows
+    )
 
     return "\n".join(lines)
 
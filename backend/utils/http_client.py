@@ -0,0 +1,77 @@
+"""
+Shared httpx client for outbound data-provider calls (DataForSEO, Search Atlas).
+
+One keep-alive pool per event loop, so a workflow's dozen parallel requests —
+and back-to-back workflows — reuse connections and the client's SSL context
+instead of each request paying a fresh TCP + TLS handshake.
+
+get_semaphore() gives each upstream API a process-wide cap on in-flight
+requests, so several concurrent audits share one rate budget instead of
+fanning out past the provider's limits and into retries.
+
+request_timeout() caps the wall-clock time of each request a caller makes,
+counted from when the request gets its semaphore slot, so time spent queued
+behind other audits never eats into it.
+
+Usage:
+    from utils.http_client import get_http_client, get_semaphore, request_deadline
+    async with get_semaphore("searchatlas", 10):
+        async with request_deadline():
+            resp = await get_http_client().post(url, json=payload)
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+import httpx
+
+# Limits are per client, across hosts — sized for several concurrent audits
+_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=40, keepalive_expiry=60.0)
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the pooled client for the running event loop, creating it if needed."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop or _client.is_closed:
+        _client = httpx.AsyncClient(timeout=30.0, limits=_LIMITS)
+        _client_loop = loop
+    return _client
+
+
+_semaphores: dict[str, tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+
+
+def get_semaphore(name: str, limit: int) -> asyncio.Semaphore:
+    """Concurrency cap shared by every call to one upstream API on the running loop."""
+    loop = asyncio.get_running_loop()
+    entry = _semaphores.get(name)
+    if entry is None or entry[0] is not loop:
+        entry = _semaphores[name] = (loop, asyncio.Semaphore(limit))
+    return entry[1]
+
+
+# Per-request cap set by request_timeout(); None means no cap beyond httpx's own
+_request_timeout: ContextVar[Optional[float]] = ContextVar("request_timeout", default=None)
+
+
+@contextmanager
+def request_timeout(seconds: float) -> Iterator[None]:
+    """Cap each provider request made inside the block at `seconds` once it holds its slot."""
+    token = _request_timeout.set(seconds)
+    try:
+        yield
+    finally:
+        _request_timeout.reset(token)
+
+
+def request_deadline() -> asyncio.Timeout:
+    """asyncio.timeout() for the caller's request_timeout(), entered after the semaphore."""
+    return asyncio.timeout(_request_timeout.get())
@@ -15,10 +15,14 @@ Never call: content_genius, digital_pr, linklab, otto_ppc, press_release,
 from __future__ import annotations
 
 import os
-import httpx
+
+from utils.http_client import get_http_client, get_semaphore, request_deadline
 
 SA_MCP_URL = "https://mcp.searchatlas.com/api/v1/mcp"
 
+# Max in-flight Search Atlas requests across all concurrent workflows
+SA_MAX_CONCURRENCY = int(os.environ.get("SA_MAX_CONCURRENCY", "10"))
+
 
 def _api_key() -> str:
     key = os.environ.get("SEARCHATLAS_API_KEY", "")
@@ -31,7 +35,8 @@ async def sa_call(tool: str, op: str, params: dict | None = None) -> str:
     """
     Call a Search Atlas MCP tool operation.
     Returns the raw text response from the tool (already formatted as markdown).
-    Raises ValueError on MCP-level errors.
+    Raises ValueError on MCP-level errors, and TimeoutError if the request
+    outlasts the caller's request_timeout().
     """
     payload = {
         "jsonrpc": "2.0",
@@ -46,16 +51,17 @@ async def sa_call(tool: str, op: str, params: dict | None = None) -> str:
         },
     }
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.post(
-            SA_MCP_URL,
-            headers={
-                "X-API-KEY": _api_key(),
-                "Content-Type": "application/json",
-            },
-            json=payload,
-        )
-        resp.raise_for_status()
+    async with get_semaphore("searchatlas", SA_MAX_CONCURRENCY):
+        async with request_deadline():
+            resp = await get_http_client().post(
+                SA_MCP_URL,
+                headers={
+                    "X-API-KEY": _api_key(),
+                    "Content-Type": "application/json",
+                },
+                json=payload,
+            )
+    resp.raise_for_status()
 
     data = resp.json()
 
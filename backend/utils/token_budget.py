@@ -0,0 +1,81 @@
+"""
+Input-token headroom for workflow prompts.
+
+Each workflow's static system prompt is counted once per process with the
+count_tokens endpoint and cached. Per-run text (user prompt, strategy
+appendix) is estimated at ~4 chars/token, so a workflow can trim its data
+before calling messages.stream. Without this, an oversized request is only
+rejected by the API after data collection has already been paid for.
+"""
+
+import logging
+import time
+
+import anthropic
+
+logger = logging.getLogger(__name__)
+
+MODEL_CONTEXT    = 200_000
+CONTEXT_HEADROOM = 2_048
+CHARS_PER_TOKEN  = 4
+
+# After a failed count_tokens call, skip the endpoint for this long and use the estimate
+COUNT_RETRY_SECONDS = 300
+
+_system_token_counts: dict[tuple[str, int], int] = {}
+_count_retry_at: dict[tuple[str, int], float] = {}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap input-token estimate for per-run text."""
+    return len(text) // CHARS_PER_TOKEN
+
+
+async def system_token_count(
+    client: anthropic.AsyncAnthropic,
+    model: str,
+    system_prompt: str,
+) -> int:
+    """
+    Exact token count of a static system prompt, fetched once per process.
+    Falls back to the char estimate if the count call fails, and keeps using
+    it for COUNT_RETRY_SECONDS so an outage doesn't add a failing round trip
+    to every run.
+    """
+    key = (model, hash(system_prompt))
+    if key not in _system_token_counts:
+        if time.monotonic() < _count_retry_at.get(key, 0.0):
+            return estimate_tokens(system_prompt)
+        try:
+            result = await client.messages.count_tokens(
+                model=model,
+                system=system_prompt,
+                messages=[{"role": "user", "content": "x"}],
+            )
+        except anthropic.APIError as e:
+            logger.warning("count_tokens failed for %s: %s", model, e)
+            _count_retry_at[key] = time.monotonic() + COUNT_RETRY_SECONDS
+            return estimate_tokens(system_prompt)
+        _system_token_counts[key] = result.input_tokens
+    return _system_token_counts[key]
+
+
+async def user_prompt_budget(
+    client: anthropic.AsyncAnthropic,
+    model: str,
+    system_prompt: str,
+    max_tokens: int,
+    appendix: str = "",
+) -> int:
+    """
+    Input tokens left for the user prompt once the system prompt, the
+    per-client appendix and the output budget are reserved. Thinking
+    budget_tokens is part of max_tokens, so it needs no separate term.
+    """
+    reserved = (
+        await system_token_count(client, model, system_prompt)
+        + estimate_tokens(appendix)
+        + max_tokens
+        + CONTEXT_HEADROOM
+    )
+    return max(MODEL_CONTEXT - reserved, 0)
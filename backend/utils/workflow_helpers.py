@@ -0,0 +1,275 @@
+"""
+Small helpers shared by the streaming content workflows.
+
+Input and prompt assembly, em-dash and colon-headline cleanup for streamed
+markdown, the splitter that keeps that cleanup correct across flushes,
+stream-chunk coalescing, and the cacheable system blocks for static prompt
+text long enough to be worth caching, with a log line for their hits.
+
+Usage:
+    from utils.workflow_helpers import cached_block, input_value, opt_block
+    service = input_value(inputs, "service")
+    system = [cached_block(SYSTEM_PROMPT)]
+"""
+
+import asyncio
+import logging
+import re
+from typing import AsyncIterable, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+_BOLD_DASH_RE = re.compile(r'\*\*([^*]+)\*\*\s*—\s*')
+_WORD_DASH_RE = re.compile(r'(\w)\s*—\s*(\w)')
+# Leftover em dashes, keyed by (space before, space/newline after)
+_ANY_DASH_RE = re.compile(r'( ?)—(\n| ?)')
+_DASH_REPLACEMENTS = {
+    (' ', ' '):  ', ',
+    (' ', '\n'): '.\n',
+    (' ', ''):   ',',
+    ('', ' '):   ', ',
+    ('', '\n'):  ', \n',
+    ('', ''):    ', ',
+}
+# Characters allowed in the "Label" of a "## Label: Rest" headline
+_HEAD_LABEL_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz \t,")
+
+
+def cached_block(text: str) -> dict:
+    """
+    Text content block marked for Anthropic prompt caching. Static prompt text
+    is wrapped once at import, so every request sends a byte-identical prefix
+    the API can reuse instead of re-reading it.
+    """
+    return {"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}
+
+
+def system_blocks(static: list[dict], appendix: str) -> list[dict]:
+    """Prebuilt cached system blocks, plus an uncached per-client block when there is one."""
+    if not appendix:
+        return static
+    return [*static, {"type": "text", "text": appendix}]
+
+
+def log_cache_usage(name: str, usage) -> None:
+    """Log how many prompt tokens a finished request read from / wrote to the cache."""
+    logger.info(
+        "%s prompt cache: %s read, %s written",
+        name, usage.cache_read_input_tokens or 0, usage.cache_creation_input_tokens or 0,
+    )
+
+
+def input_value(inputs: dict, key: str, default: str = "") -> str:
+    """Stripped inputs[key]; default when the field is missing, None, or blank."""
+    value = inputs.get(key)
+    return (value.strip() if value else "") or default
+
+
+def opt_line(label: str, value: str) -> str:
+    """Optional "**Label:** value" prompt line — or nothing."""
+    return f"\n**{label}:** {value}" if value else ""
+
+
+def opt_block(heading: str, body: str) -> str:
+    """Optional prompt section: blank line, bold heading, body — or nothing."""
+    return f"\n\n**{heading}**\n{body}" if body else ""
+
+
+async def safe(coro, default):
+    """Await coro, returning default instead of raising so one failed source can't sink the run."""
+    try:
+        return await coro
+    except Exception:
+        return default
+
+
+async def coalesce_text(
+    chunks: AsyncIterable[str],
+    max_chars: int = 256,
+    max_delay: float = 0.1,
+) -> AsyncIterator[str]:
+    """
+    Re-yield streamed text in fewer, larger pieces: a piece goes out once
+    max_chars have built up, or max_delay seconds after its first char arrived
+    even if the model has paused, so a stall never holds back buffered text.
+    """
+    source = aiter(chunks)
+    loop = asyncio.get_running_loop()
+    buf = ""
+    deadline = 0.0
+    # The pending read survives a timed flush; cancelling it would end the stream
+    pending: asyncio.Future | None = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(source))
+            timeout = max(deadline - loop.time(), 0.0) if buf else None
+            done, _ = await asyncio.wait((pending,), timeout=timeout)
+            if not done:
+                yield buf
+                buf = ""
+                continue
+            finished, pending = pending, None
+            try:
+                text = finished.result()
+            except StopAsyncIteration:
+                break
+            except Exception:
+                # Text already received still goes out before the error does
+                if buf:
+                    yield buf
+                raise
+            if not buf:
+                deadline = loop.time() + max_delay
+            buf += text
+            if len(buf) >= max_chars:
+                yield buf
+                buf = ""
+    finally:
+        if pending is not None:
+            pending.cancel()
+    if buf:
+        yield buf
+
+
+def strip_em_dashes(text: str) -> str:
+    """Rewrite em dashes as commas/periods, turning "**Bold** — text" into "**Bold.** text"."""
+    # Substring check runs at memchr speed and lets most streamed lines skip the regexes
+    if "—" in text:
+        # Fix bullet format: **Bold** — description → **Bold.** Description
+        text = _BOLD_DASH_RE.sub(r'**\1.** ', text)
+        # Fix sentence em dashes: word — word → word, word
+        text = _WORD_DASH_RE.sub(r'\1, \2', text)
+        # Clean up remaining em dashes in one pass
+        text = _ANY_DASH_RE.sub(lambda m: _DASH_REPLACEMENTS[m.groups()], text)
+    return text
+
+
+def fix_colon_headlines(text: str) -> str:
+    """
+    Rewrite "## Label: Rest" as "## Rest in Label" (labels of ≤4 words) or
+    "## Rest", line by line, so each headline is rewritten at most once.
+    Lines inside ``` fences are left untouched.
+    """
+    lines = text.split("\n")
+    in_fence = False
+    for i, line in enumerate(lines):
+        if line.startswith("```"):
+            in_fence = not in_fence
+            continue
+        if in_fence or not line.startswith("##"):
+            continue
+        body = line.lstrip("#")
+        hashes = line[:len(line) - len(body)]
+        if len(hashes) > 3 or body[:1] not in (" ", "\t"):
+            continue
+        label, colon, rest = body.lstrip(" \t").partition(":")
+        if (
+            not colon or len(label) < 2 or not label[0].isalpha()
+            or not _HEAD_LABEL_CHARS.issuperset(label)
+            or rest[:1] not in (" ", "\t")
+        ):
+            continue
+        # "## Label:  " keeps its last blank as the rest, as the old regex did
+        rest = rest.lstrip(" \t") or rest[1:][-1:]
+        if not rest:
+            continue
+        lines[i] = f"{hashes} {rest} in {label}" if len(label.split()) <= 4 else f"{hashes} {rest}"
+    return "\n".join(lines)
+
+
+def clean_content(text: str) -> str:
+    """Remove AI writing patterns: em dashes and colon headlines."""
+    text = strip_em_dashes(text)
+    # Substring check skips the line scan for chunks with no headline colon
+    if "##" in text and ":" in text:
+        text = fix_colon_headlines(text)
+    return text
+
+
+class CleanSplitter:
+    """
+    Buffer for streamed markdown that hands back text once it is safe to
+    clean: everything up to the last newline where cleaning the two halves
+    separately can't change what the dash and headline fixes match. A boundary
+    is unsafe when an em dash or whitespace run touches it (the dash patterns
+    span whitespace) or when it falls inside an open **bold** pair or ```
+    fence (headline fixes skip fenced lines, so fences must stay whole).
+
+    Each newline is judged once, as soon as the character after it arrives,
+    with the bold/fence counts carried forward line by line, so a long
+    unclosed fence costs linear time rather than a rescan per chunk.
+
+    Usage:
+        splitter = CleanSplitter()
+        async for text in stream.text_stream:
+            ready = splitter.feed(text)
+            if ready:
+                yield clean_content(ready)
+        yield clean_content(splitter.flush())
+    """
+
+    def __init__(self) -> None:
+        self._lines: list[str] = []   # complete lines held back, each ending in "\n"
+        self._partial: list[str] = []  # pieces of the line still streaming in
+        self._ready = 0               # how many held lines end at a safe boundary
+        self._judging = False         # last held line's newline awaits its next char
+        self._pos = 0                 # stream offset of the current line's start
+        self._ink = (-1, "")          # offset and char of the last non-whitespace char
+        self._bold = 0                # "**" markers seen so far
+        self._fences = 0              # ``` fence lines seen so far
+
+    def feed(self, text: str) -> str:
+        """Take the next streamed piece; return the text now safe to clean (may be "")."""
+        if not text:
+            return ""
+        if self._judging:
+            self._judge(text[0])
+        *complete, tail = text.split("\n")
+        for i, piece in enumerate(complete):
+            if self._partial:
+                piece = "".join(self._partial) + piece
+                self._partial = []
+            self._add_line(piece)
+            following = complete[i + 1] if i + 1 < len(complete) else tail
+            if following or i + 1 < len(complete):
+                self._judge(following[:1] or "\n")
+            else:
+                self._judging = True
+        if tail:
+            self._partial.append(tail)
+        # Only pieces with a newline release text, so output breaks on line ends
+        if not complete or not self._ready:
+            return ""
+        ready = "".join(self._lines[:self._ready])
+        del self._lines[:self._ready]
+        self._ready = 0
+        return ready
+
+    def flush(self) -> str:
+        """Everything still held back, once the stream has ended."""
+        rest = "".join(self._lines) + "".join(self._partial)
+        self.__init__()
+        return rest
+
+    def _add_line(self, line: str) -> None:
+        self._bold += line.count("**")
+        self._fences += line.startswith("```")
+        ink = line.rstrip()
+        if ink:
+            self._ink = (self._pos + len(ink) - 1, ink[-1])
+        self._pos += len(line)
+        self._lines.append(line + "\n")
+        self._judging = False
+
+    def _judge(self, nxt: str) -> None:
+        """Decide whether the newline at self._pos, followed by nxt, is a safe boundary."""
+        ink_at, ink = self._ink
+        if (
+            not nxt.isspace() and nxt != "—"
+            and not (ink == "—" and ink_at >= self._pos - 64)
+            and self._bold % 2 == 0 and self._fences % 2 == 0
+        ):
+            self._ready = len(self._lines)
+        self._pos += 1
+        self._judging = False
@@ -24,12 +24,14 @@ inputs keys:
 
 import os
 import asyncio
+import datetime as _dt
 import re
 import math
 import anthropic
 from typing import AsyncGenerator, Optional
 
 from utils.searchatlas import sa_call
+from utils.workflow_helpers import safe
 from utils.dataforseo import (
     research_competitors,
     get_keyword_search_volumes,
@@ -60,8 +62,11 @@ _STATE_MAP = {
 _STATE_ABBR = {v: k for k, v in _STATE_MAP.items()}
 
 
+_LOCATION_SPLIT_RE = re.compile(r"[,\s]+")
+
+
 def _build_location_name(location_raw: str) -> str:
-    parts = re.split(r"[,\s]+", location_raw.strip())
+    parts = _LOCATION_SPLIT_RE.split(location_raw.strip())
     parts = [p.strip() for p in parts if p.strip()]
     if len(parts) >= 2:
         city = " ".join(parts[:-1]).title()
@@ -182,6 +187,24 @@ _METRO_LOOKUP: dict[tuple[str, str], list[str]] = {
 }
 
 
+# Every known metro city (lowercase), matched as whole words in free text.
+# The zero-width lookahead lets "north las vegas" and "las vegas" both match;
+# names sharing a prefix ("orange park" / "orange") are covered by _CITY_CONTAINS.
+_KNOWN_CITIES: frozenset[str] = frozenset(
+    c.lower() for cities in _METRO_LOOKUP.values() for c in cities
+)
+_CITY_RE = re.compile(
+    r"\b(?=("
+    + "|".join(re.escape(c) for c in sorted(_KNOWN_CITIES, key=len, reverse=True))
+    + r")\b)"
+)
+_CITY_CONTAINS: dict[str, list[str]] = {
+    long: [short for short in _KNOWN_CITIES
+           if short != long and re.search(r"\b" + re.escape(short) + r"\b", long)]
+    for long in _KNOWN_CITIES
+}
+
+
 def _get_metro_cities(city: str, state_abbr: str, n: int = 5) -> list[str]:
     """Return nearby metro cities to search for competitors."""
     key = (city.lower().strip(), state_abbr.lower().strip())
@@ -1362,6 +1385,25 @@ def _build_per_city_keyword_tables(
     return "\n\n".join(sections)
 
 
+def _score_keywords(volumes: list[dict], difficulty: list[dict]) -> list[tuple]:
+    """
+    Weighted priority score per keyword: volume*0.1 + cpc*5 - difficulty*0.5
+    (unknown difficulty counts as 50). Returns (score, kw, diff) sorted best-first,
+    skipping zero-volume keywords.
+    """
+    diff_get = {kw.get("keyword", ""): kw.get("keyword_difficulty") for kw in difficulty}.get
+    scored = []
+    append = scored.append
+    for kw in volumes:
+        vol = kw.get("search_volume") or 0
+        if not vol:
+            continue
+        diff = diff_get(kw.get("keyword", ""))
+        append((vol * 0.1 + float(kw.get("cpc") or 0) * 5.0 - (diff or 50) * 0.5, kw, diff))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored
+
+
 def _build_priority_keyword_table(
     volumes: list[dict],
     difficulty: list[dict],
@@ -1372,26 +1414,16 @@ def _build_priority_keyword_table(
     if not volumes:
         return ""
 
-    diff_lookup = {kw.get("keyword", ""): kw.get("keyword_difficulty") for kw in difficulty}
-
-    scored = []
-    for kw in volumes:
-        keyword = kw.get("keyword", "")
-        vol = kw.get("search_volume") or 0
-        if vol == 0:
-            continue
-        cpc = float(kw.get("cpc", 0) or 0)
-        diff = diff_lookup.get(keyword)
-        score = (vol * 0.1) + (cpc * 5) - ((diff or 50) * 0.5)
-        scored.append((score, kw, diff))
-
-    scored.sort(key=lambda x: x[0], reverse=True)
+    scored = _score_keywords(volumes, difficulty)
 
     lines = [
         "| Priority | Keyword | Volume | CPC | Difficulty | Why |",
         "|----------|---------|--------|-----|-----------|-----|",
     ]
 
+    city_lower = city.lower()
+    metro_extra_lower = [(c, c.lower()) for c in (metro_cities or [])[1:4]]
+
     for idx, (score, kw, diff) in enumerate(scored[:10], 1):
         keyword = kw.get("keyword", "")
         vol = kw.get("search_volume") or 0
@@ -1399,7 +1431,7 @@ def _build_priority_keyword_table(
         diff_str = f"{diff}/100" if diff is not None else "—"
         kw_lower = keyword.lower()
         cpc_val = float(kw.get("cpc", 0) or 0)
-        if "emergency" in kw_lower and city.lower() in kw_lower:
+        if "emergency" in kw_lower and city_lower in kw_lower:
             reason = f"Urgent buyers in {city}, ${cpc_val:.0f}/click value"
         elif "emergency" in kw_lower:
             reason = "Highest CPC — urgent buyers pay premium"
@@ -1411,10 +1443,10 @@ def _build_priority_keyword_table(
             reason = "Low competition, premium service margin"
         elif "water heater" in kw_lower:
             reason = "High-value repair, strong buying intent"
-        elif city.lower() in kw_lower:
+        elif city_lower in kw_lower:
             reason = f"Your home base, lower competition"
-        elif metro_cities and any(c.lower() in kw_lower for c in metro_cities[1:4]):
-            matched = next(c for c in metro_cities[1:4] if c.lower() in kw_lower)
+        elif any(cl in kw_lower for _, cl in metro_extra_lower):
+            matched = next(c for c, cl in metro_extra_lower if cl in kw_lower)
             reason = f"Untapped market — expand to {matched}"
         elif diff is not None and diff < 30:
             reason = "Low difficulty — quick ranking win"
@@ -1429,15 +1461,20 @@ def _build_priority_keyword_table(
     return "\n".join(lines)
 
 
+# Everything but digits and "." in "$1,200/job"- or "€1,200"-style inputs
+_JOB_VALUE_STRIP_RE = re.compile(r"[^\d.]")
+
+
 def _build_roi_table(
     total_traffic_goal: int,
     avg_job_value_str: str,
     service: str,
     is_water_treatment: bool = False,
 ) -> tuple[str, str]:
+    cleaned = _JOB_VALUE_STRIP_RE.sub("", avg_job_value_str) if avg_job_value_str else ""
     try:
-        job_val = float(re.sub(r"[^\d.]", "", avg_job_value_str)) if avg_job_value_str else 350
-    except (ValueError, TypeError):
+        job_val = float(cleaned) if cleaned else 350
+    except ValueError:
         job_val = 350
 
     # Blend in water treatment job values when detected ($2K-$5K avg)
@@ -1653,15 +1690,11 @@ def _extract_mentioned_cities(text: str, metro_cities: list[str]) -> list[str]:
     that aren't already in the metro_cities list.
     Returns deduplicated list of extra cities found.
     """
-    all_known: set[str] = set()
-    for cities_list in _METRO_LOOKUP.values():
-        all_known.update(c.lower() for c in cities_list)
-
     metro_lower = {c.lower() for c in metro_cities}
     mentioned: list[str] = []
-    for city_lower in all_known:
-        pattern = r'\b' + re.escape(city_lower) + r'\b'
-        if re.search(pattern, text.lower()):
+    for match in _CITY_RE.finditer(text.lower()):
+        found = match.group(1)
+        for city_lower in (found, *_CITY_CONTAINS[found]):
             if city_lower not in metro_lower:
                 city_title = city_lower.title()
                 if city_title not in mentioned:
@@ -1729,40 +1762,38 @@ async def run_prospect_audit(
         service, metro_cities, state_abbr, state_full
     )
 
-    sa_data, keyword_volumes, domain_city_map = await asyncio.gather(
-        sa_task, vol_task, metro_competitors_task,
-        return_exceptions=True,
-    )
-    if isinstance(sa_data, Exception):
-        sa_data = {}
-    if isinstance(keyword_volumes, Exception):
-        keyword_volumes = []
-    if isinstance(domain_city_map, Exception):
-        domain_city_map = {}
+    async with asyncio.TaskGroup() as tg:
+        t_sa    = tg.create_task(safe(sa_task, {}))
+        t_vol   = tg.create_task(safe(vol_task, []))
+        t_metro = tg.create_task(safe(metro_competitors_task, {}))
+    sa_data         = t_sa.result()
+    keyword_volumes = t_vol.result()
+    domain_city_map = t_metro.result()
 
     yield f"> Pulling traffic data for {len(domain_city_map)} competitors across the {city} metro...\n\n"
 
     # ── Phase 2: Competitor profiling + prospect rank ──────────────────────
     # Use state-level location for DFS Labs calls — city-level is too granular
     # and returns empty traffic data for metro-wide competitors.
-    competitor_profiles, prospect_rank, keyword_difficulty = await asyncio.gather(
-        _profile_competitors(domain_city_map, state_location_name),
-        _get_prospect_rank(domain, state_location_name),
-        (
+    async with asyncio.TaskGroup() as tg:
+        t_profiles = tg.create_task(safe(
+            _profile_competitors(domain_city_map, state_location_name), [],
+        ))
+        t_rank = tg.create_task(safe(
+            _get_prospect_rank(domain, state_location_name),
+            {"domain": domain, "keywords": 0, "etv": 0, "etv_cost": 0},
+        ))
+        t_diff = tg.create_task(safe(
             get_bulk_keyword_difficulty(
                 [v["keyword"] for v in (keyword_volumes or [])[:20] if v.get("keyword") and (v.get("search_volume") or 0) > 0],
                 location_name,
             )
-            if keyword_volumes and location_name else _empty_list()
-        ),
-        return_exceptions=True,
-    )
-    if isinstance(competitor_profiles, Exception):
-        competitor_profiles = []
-    if isinstance(prospect_rank, Exception):
-        prospect_rank = {"domain": domain, "keywords": 0, "etv": 0, "etv_cost": 0}
-    if isinstance(keyword_difficulty, Exception):
-        keyword_difficulty = []
+            if keyword_volumes and location_name else _empty_list(),
+            [],
+        ))
+    competitor_profiles = t_profiles.result()
+    prospect_rank       = t_rank.result()
+    keyword_difficulty  = t_diff.result()
 
     # Gap 2: second SERP pass for water treatment niche competitors
     wt_profiles: list[dict] = []
@@ -1775,8 +1806,6 @@ async def run_prospect_audit(
             )
             if wt_domain_map:
                 wt_profiles = await _profile_competitors(wt_domain_map, state_location_name)
-                if isinstance(wt_profiles, Exception):
-                    wt_profiles = []
         except Exception:
             wt_profiles = []
 
@@ -1784,7 +1813,7 @@ async def run_prospect_audit(
     yield "---\n\n"
 
     # ── Phase 3: Compute market metrics ───────────────────────────────────
-    today = __import__("datetime").date.today().strftime("%B %d, %Y")
+    today = _dt.date.today().strftime("%B %d, %Y")
 
     kw_vol_list = keyword_volumes or []
     total_searches = sum(kw.get("search_volume") or 0 for kw in kw_vol_list)
@@ -1807,25 +1836,27 @@ async def run_prospect_audit(
         competitor_profiles, client_name, prospect_rank
     )
 
-    market_leader_section = (
-        _build_market_leader_section(market_leader) if market_leader else ""
-    )
-
-    # Side-by-side comparison table for the local market leader
-    leader_comparison_table = (
-        _build_comparison_table(market_leader, prospect_rank, client_name)
-        if market_leader else ""
-    )
-
-    other_competitors_section = _build_other_competitors_section(competitor_profiles)
-
-    pillar_table, high_value_kws = _build_keyword_pillar_table(kw_vol_list, service)
-    high_value_table = _build_high_value_keyword_table(high_value_kws)
-    why_this_matters = _build_why_this_matters_box(high_value_kws, service)
-    service_subsections = _build_service_subsection_tables(kw_vol_list, service)
+    # Empty competitor / keyword results (also the partial-failure path) skip
+    # the section builders entirely rather than letting each one bail out.
+    if market_leader:
+        market_leader_section = _build_market_leader_section(market_leader)
+        # Side-by-side comparison table for the local market leader
+        leader_comparison_table = _build_comparison_table(market_leader, prospect_rank, client_name)
+        other_competitors_section = _build_other_competitors_section(competitor_profiles)
+    else:
+        market_leader_section = leader_comparison_table = other_competitors_section = ""
+
+    if kw_vol_list:
+        pillar_table, high_value_kws = _build_keyword_pillar_table(kw_vol_list, service)
+        high_value_table = _build_high_value_keyword_table(high_value_kws)
+        why_this_matters = _build_why_this_matters_box(high_value_kws, service)
+        service_subsections = _build_service_subsection_tables(kw_vol_list, service)
+        priority_table = _build_priority_keyword_table(kw_vol_list, keyword_difficulty or [], service, city, metro_cities=metro_cities)
+    else:
+        pillar_table = high_value_table = why_this_matters = service_subsections = priority_table = ""
+        high_value_kws = []
     # Gap 4: pass extra_cities so Queen Creek / San Tan Valley etc. appear even with no DFS volume
     per_city_tables = _build_per_city_keyword_tables(kw_vol_list, metro_cities, extra_cities=extra_cities)
-    priority_table = _build_priority_keyword_table(kw_vol_list, keyword_difficulty or [], service, city, metro_cities=metro_cities)
 
     # Gap 3: aggregate "what Google Ads would cost you" callout
     total_ads_cost_callout = _build_total_ads_cost_callout(total_searches, avg_cpc, high_value_kws)
@@ -8,6 +8,8 @@ ready to copy-paste into any page.
 import anthropic
 from typing import AsyncGenerator
 
+from utils.workflow_helpers import input_value, opt_block, opt_line
+
 SYSTEM_PROMPT = """You are ProofPilot's Schema Markup Specialist. You generate valid, Google-compliant JSON-LD structured data that improves search visibility and enables rich results.
 
 Your output must follow this exact report structure:
@@ -79,62 +81,29 @@ async def run_schema_generator(
         services_list    comma-separated services offered (optional)
         hours            business hours (optional)
         notes            additional context — FAQ questions, specific pages, etc. (optional)
+        quiet            skip the progress preamble for API-only callers (optional)
     """
-    business_name = inputs.get("business_name", client_name).strip()
-    business_type = inputs.get("business_type", "home service business").strip()
-    location      = inputs.get("location", "").strip()
-    schema_types  = inputs.get("schema_types", "LocalBusiness, FAQPage, Service").strip()
-    phone         = inputs.get("phone", "").strip()
-    address       = inputs.get("address", "").strip()
-    website       = inputs.get("website", "").strip()
-    services_list = inputs.get("services_list", "").strip()
-    hours         = inputs.get("hours", "").strip()
-    notes         = inputs.get("notes", "").strip()
-
-    yield f"> Generating schema markup for **{client_name}**...\n\n---\n\n"
+    business_name = input_value(inputs, "business_name", client_name)
+    business_type = input_value(inputs, "business_type", "home service business")
+    location      = input_value(inputs, "location")
+    schema_types  = input_value(inputs, "schema_types", "LocalBusiness, FAQPage, Service")
+    phone         = input_value(inputs, "phone")
+    address       = input_value(inputs, "address")
+    website       = input_value(inputs, "website")
+    services_list = input_value(inputs, "services_list")
+    hours         = input_value(inputs, "hours")
+    notes         = input_value(inputs, "notes")
+
+    if not inputs.get("quiet"):
+        yield f"> Generating schema markup for **{client_name}**...\n\n---\n\n"
 
     # ── Build the user prompt ──────────────────────────────
-    lines = [
-        f"Generate complete JSON-LD structured data for **{business_name}**, a {business_type} serving {location}.",
-        "",
-        f"**Schema types to generate:** {schema_types}",
-    ]
-
-    if phone:
-        lines.append(f"**Phone:** {phone}")
-
-    if address:
-        lines.append(f"**Address:** {address}")
-
-    if website:
-        lines.append(f"**Website:** {website}")
-
-    if services_list:
-        lines.append(f"**Services offered:** {services_list}")
-
-    if hours:
-        lines.append(f"**Business hours:** {hours}")
-
-    if notes:
-        lines += [
-            "",
-            "**Additional context and instructions:**",
-            f"{notes}",
-        ]
-
-    if strategy_context and strategy_context.strip():
-        lines += [
-            "",
-            "**Strategy direction from account manager — follow this:**",
-            f"{strategy_context.strip()}",
-        ]
-
-    lines += [
-        "",
-        "Generate all schema blocks now. Every JSON-LD block must be valid, complete, and ready to copy-paste. Start with the Strategy Overview.",
-    ]
-
-    user_prompt = "\n".join(lines)
+    strategy = strategy_context.strip() if strategy_context else ""
+    user_prompt = f"""Generate complete JSON-LD structured data for **{business_name}**, a {business_type} serving {location}.
+
+**Schema types to generate:** {schema_types}{opt_line("Phone", phone)}{opt_line("Address", address)}{opt_line("Website", website)}{opt_line("Services offered", services_list)}{opt_line("Business hours", hours)}{opt_block("Additional context and instructions:", notes)}{opt_block("Strategy direction from account manager — follow this:", strategy)}
+
+Generate all schema blocks now. Every JSON-LD block must be valid, complete, and ready to copy-paste. Start with the Strategy Overview."""
 
     # ── Stream from Claude ─────────────────────────────────
     async with client.messages.stream(
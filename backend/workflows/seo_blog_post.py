@@ -5,30 +5,13 @@ business — 1,500–2,000 words, structured for both ranking and conversion,
 with meta description, key takeaways, FAQ, and local CTA.
 """
 
-import re
 import anthropic
 from typing import AsyncGenerator
 
+from utils.workflow_helpers import (
+    CleanSplitter, cached_block, clean_content, input_value, opt_block,
+)
 
-def _clean_content(text: str) -> str:
-    """Remove AI writing patterns: em dashes and colon headlines."""
-    # Fix bullet format: **Bold** — description → **Bold.** Description
-    text = re.sub(r'\*\*([^*]+)\*\*\s*—\s*', r'**\1.** ', text)
-    # Fix sentence em dashes: word — word → word, word
-    text = re.sub(r'(\w)\s*—\s*(\w)', r'\1, \2', text)
-    # Clean up remaining em dashes
-    text = text.replace(' — ', ', ')
-    text = text.replace(' —\n', '.\n')
-    text = text.replace(' —', ',')
-    text = text.replace('— ', ', ')
-    text = text.replace('—', ', ')
-    # Fix colon headlines: "## Label: Rest" → "## Rest in Label" (short labels ≤4 words)
-    text = re.sub(
-        r'^(#{2,3})\s+([A-Za-z][A-Za-z\s,]+?):\s+(.+)$',
-        lambda m: f"{m.group(1)} {m.group(3)} in {m.group(2)}" if len(m.group(2).split()) <= 4 else f"{m.group(1)} {m.group(3)}",
-        text, flags=re.MULTILINE
-    )
-    return text
 
 SYSTEM_PROMPT = """You are an expert SEO content writer specializing in home service businesses. You write for ProofPilot, a results-driven digital marketing agency.
 
@@ -84,6 +67,8 @@ Always end with: "Looking for a trusted [business_type] in [location]? [2–3 se
 
 Do NOT write any preamble, meta-commentary, or explanation. Start the output immediately with META:"""
 
+_SYSTEM_BLOCKS = [cached_block(SYSTEM_PROMPT)]
+
 
 async def run_seo_blog_post(
     client: anthropic.AsyncAnthropic,
@@ -102,67 +87,49 @@ async def run_seo_blog_post(
         tone            e.g. "educational", "conversational", "authoritative" (optional)
         internal_links  comma-separated service pages to link to (optional)
         notes           any context, angles, or things to emphasize (optional)
+        quiet           skip the progress preamble for API-only callers (optional)
     """
-    business_type  = inputs.get("business_type", "home service business").strip()
-    location       = inputs.get("location", "").strip()
-    keyword        = inputs.get("keyword", "").strip()
-    audience       = inputs.get("audience", "homeowners").strip() or "homeowners"
-    tone           = inputs.get("tone", "conversational").strip() or "conversational"
-    internal_links = inputs.get("internal_links", "").strip()
-    notes          = inputs.get("notes", "").strip()
+    business_type  = input_value(inputs, "business_type", "home service business")
+    location       = input_value(inputs, "location")
+    keyword        = input_value(inputs, "keyword")
+    audience       = input_value(inputs, "audience", "homeowners")
+    tone           = input_value(inputs, "tone", "conversational")
+    internal_links = input_value(inputs, "internal_links")
+    notes          = input_value(inputs, "notes")
 
-    yield f"> Generating SEO blog post for **{client_name}**...\n\n"
+    if not inputs.get("quiet"):
+        yield f"> Generating SEO blog post for **{client_name}**...\n\n"
 
     # ── Build the user prompt ──────────────────────────────
-    lines = [
-        f"Write a full SEO blog post for **{client_name}**, a {business_type} serving {location}.",
-        "",
-        f"**Primary keyword to target:** {keyword}",
-        f"**Target audience:** {audience}",
-        f"**Tone:** {tone}",
-    ]
-
-    if internal_links:
-        lines.append(f"**Internal links to weave in naturally:** {internal_links}")
-
-    if notes:
-        lines += [
-            "",
-            "**Content direction and context — use this to make the post non-generic:**",
-            f"{notes}",
-        ]
-
-    if strategy_context and strategy_context.strip():
-        lines += [
-            "",
-            "**Strategy direction from account manager — follow this carefully:**",
-            f"{strategy_context.strip()}",
-        ]
-
-    lines += [
-        "",
-        "Write the complete blog post now. Start immediately with META: — no preamble.",
-        "",
-        "BEFORE YOU WRITE ANYTHING — commit to these two rules:",
-        "1. ZERO EM DASHES (—) in your entire response. Not one. Use a comma or start a new sentence instead.",
-        "2. ZERO COLONS IN ANY H2 OR H3 HEADLINE. Headlines must be natural phrases. Wrong: 'Our Process: What to Expect' / Right: 'What to Expect When You Call'. Read every headline before writing it.",
-    ]
-
-    user_prompt = "\n".join(lines)
-
-    # ── Generate from Claude (buffered for post-processing) ────────────────
-    chunks: list[str] = []
+    strategy = strategy_context.strip() if strategy_context else ""
+    links_line = f"\n**Internal links to weave in naturally:** {internal_links}" if internal_links else ""
+    user_prompt = f"""Write a full SEO blog post for **{client_name}**, a {business_type} serving {location}.
+
+**Primary keyword to target:** {keyword}
+**Target audience:** {audience}
+**Tone:** {tone}{links_line}{opt_block("Content direction and context — use this to make the post non-generic:", notes)}{opt_block("Strategy direction from account manager — follow this carefully:", strategy)}
+
+Write the complete blog post now. Start immediately with META: — no preamble.
+
+BEFORE YOU WRITE ANYTHING — commit to these two rules:
+1. ZERO EM DASHES (—) in your entire response. Not one. Use a comma or start a new sentence instead.
+2. ZERO COLONS IN ANY H2 OR H3 HEADLINE. Headlines must be natural phrases. Wrong: 'Our Process: What to Expect' / Right: 'What to Expect When You Call'. Read every headline before writing it."""
+
+    # ── Generate from Claude, cleaning complete lines as they arrive ───────
+    splitter = CleanSplitter()
     async with client.messages.stream(
         model="claude-sonnet-4-6",
         max_tokens=10000,
         thinking={"type": "enabled", "budget_tokens": 5000},
-        system=SYSTEM_PROMPT,
+        system=_SYSTEM_BLOCKS,
         messages=[{"role": "user", "content": user_prompt}],
     ) as stream:
         async for text in stream.text_stream:
-            chunks.append(text)
-
-    # ── Post-process to remove AI writing patterns ──────────────────────
-    raw = "".join(chunks)
-    cleaned = _clean_content(raw)
-    yield cleaned
+            ready = splitter.feed(text)
+            if ready:
+                yield clean_content(ready)
+
+    # ── Post-process the tail ───────────────────────────────────────────
+    tail = splitter.flush()
+    if tail:
+        yield clean_content(tail)
@@ -14,10 +14,16 @@ inputs keys:
     location         — e.g. Chandler, AZ (optional context)
     notes            — additional context (optional)
 """
+import logging
 import anthropic
 from typing import AsyncGenerator
 
-SYSTEM_PROMPT = """You are ProofPilot's SEO Content Analyst. You audit on-page SEO from pasted content — analyzing title tags, meta descriptions, header structure, keyword usage, search intent alignment, content depth, and E-E-A-T signals. You produce a specific, prioritized fix list that any writer can execute.
+from utils.token_budget import CHARS_PER_TOKEN, estimate_tokens, user_prompt_budget
+from utils.workflow_helpers import cached_block, log_cache_usage, system_blocks
+
+logger = logging.getLogger(__name__)
+
+STATIC_SYSTEM_PROMPT = """You are ProofPilot's SEO Content Analyst. You audit on-page SEO from pasted content — analyzing title tags, meta descriptions, header structure, keyword usage, search intent alignment, content depth, and E-E-A-T signals. You produce a specific, prioritized fix list that any writer can execute.
 
 Your output must follow this exact report structure:
 
@@ -180,6 +186,30 @@ Provide specific guidance on what to add:
 - Base keyword density estimates on word count and keyword frequency in the provided content
 - For intent analysis, use your knowledge of how Google ranks this keyword type"""
 
+_SYSTEM_BLOCKS = [cached_block(STATIC_SYSTEM_PROMPT)]
+
+
+_MODEL      = "claude-sonnet-4-6"
+_MAX_TOKENS = 10000
+
+# Pasted page content is capped at roughly this many input tokens
+_CONTENT_TOKEN_BUDGET = 40_000
+
+
+def _truncate_content(content: str, max_tokens: int = _CONTENT_TOKEN_BUDGET) -> str:
+    """
+    Bound pasted content to max_tokens, at the same chars/token ratio as estimate_tokens().
+    Keeps the first 80% and last 20% of the budget — titles and intro sit at
+    the top, CTAs and footer at the bottom — with a marker where text was cut.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(content) <= max_chars:
+        return content
+    head = max_chars * 4 // 5
+    tail = max_chars - head
+    cut = len(content) - head - tail
+    return f"{content[:head]}\n\n⟨…truncated {cut:,} chars⟩\n\n{content[len(content) - tail:]}"
+
 
 async def run_seo_content_audit(
     client: anthropic.AsyncAnthropic,
@@ -187,7 +217,7 @@ async def run_seo_content_audit(
     strategy_context: str,
     client_name: str,
 ) -> AsyncGenerator[str, None]:
-    content      = inputs.get("content", "").strip()
+    content      = _truncate_content(inputs.get("content", "").strip())
     keyword      = inputs.get("keyword", "").strip()
     title_tag    = inputs.get("title_tag", "").strip()
     meta_desc    = inputs.get("meta_description", "").strip()
@@ -214,35 +244,39 @@ async def run_seo_content_audit(
     if location:
         lines.append(f"**Location:** {location}")
 
-    lines += [
-        "",
-        "## Page Content",
-        content,
-    ]
+    lines += ["", "## Page Content"]
+    content_idx = len(lines)
+    lines.append(content)
 
     if notes:
         lines += ["", "## Additional Context / Focus Areas", notes]
 
-    if strategy_context and strategy_context.strip():
-        lines += [
-            "",
-            "## Strategy Direction",
-            strategy_context.strip(),
-        ]
-
     lines += [
         "",
         "Produce the full SEO content audit now. Be extremely specific — quote actual text when flagging issues, and provide exact rewrites for title/meta/headers rather than vague guidance.",
     ]
 
     user_prompt = "\n".join(lines)
+    # Per-client direction rides in an uncached system block after the static prompt
+    appendix = (
+        f"## Strategy Direction\n{strategy_context.strip()}"
+        if strategy_context and strategy_context.strip() else ""
+    )
+
+    # Shrink the page content further if the prompt would overrun the context window
+    budget = await user_prompt_budget(client, _MODEL, STATIC_SYSTEM_PROMPT, _MAX_TOKENS, appendix)
+    overflow = estimate_tokens(user_prompt) - budget
+    if overflow > 0:
+        logger.warning("%s prompt over budget by ~%d tokens — trimming content", __name__, overflow)
+        lines[content_idx] = _truncate_content(content, max(estimate_tokens(content) - overflow, 0))
+        user_prompt = "\n".join(lines)
 
     async with client.messages.stream(
-        model="claude-sonnet-4-6",
-        max_tokens=10000,
-        thinking={"type": "enabled", "budget_tokens": 5000},
-        system=SYSTEM_PROMPT,
+        model=_MODEL,
+        max_tokens=_MAX_TOKENS,
+        system=system_blocks(_SYSTEM_BLOCKS, appendix),
         messages=[{"role": "user", "content": user_prompt}],
     ) as stream:
         async for text in stream.text_stream:
             yield text
+        log_cache_usage(__name__, (await stream.get_final_message()).usage)
@@ -24,12 +24,13 @@ inputs keys:
 """
 
 import asyncio
+import logging
 import anthropic
 from typing import AsyncGenerator
 
 from utils.dataforseo import (
     get_domain_ranked_keywords,
-    get_domain_rank_overview,
+    get_bulk_domain_rank_overview,
     get_keyword_search_volumes,
     get_bulk_keyword_difficulty,
     get_backlink_summary,
@@ -46,9 +47,14 @@ from utils.dataforseo import (
     format_keyword_trends,
     format_full_competitor_section,
 )
+from utils.http_client import request_timeout
+from utils.token_budget import estimate_tokens, user_prompt_budget
+from utils.workflow_helpers import cached_block, log_cache_usage, system_blocks
 
+logger = logging.getLogger(__name__)
 
-SYSTEM_PROMPT = """You are ProofPilot's SEO Research Strategist — the most thorough SEO research brain in the industry. You analyze data like a $200K/year SEO consultant and produce actionable content strategies that generate revenue.
+
+STATIC_SYSTEM_PROMPT = """You are ProofPilot's SEO Research Strategist — the most thorough SEO research brain in the industry. You analyze data like a $200K/year SEO consultant and produce actionable content strategies that generate revenue.
 
 You produce the **SEO Content Strategy & Research Report** — a complete roadmap that tells a home service business exactly what content to create, in what order, to maximize organic traffic and leads.
 
@@ -139,6 +145,43 @@ For EACH recommended piece of content, specify:
 - Be specific: "Create a service page targeting 'panel upgrade chandler az' (210/mo, KD 38)" not "Create service pages"
 - Think like an agency strategist presenting to a $6,200/mo client — justify every recommendation with data and expected ROI"""
 
+_SYSTEM_BLOCKS = [cached_block(STATIC_SYSTEM_PROMPT)]
+
+
+_MODEL      = "claude-sonnet-4-6"
+_MAX_TOKENS = 20000  # includes the 8k thinking budget
+
+
+# Wall-clock cap on each DataForSEO request a fetch makes. httpx's 30s timeout
+# is per read, so a trickling response could otherwise hold up the whole
+# report. Time queued for a DFS_MAX_CONCURRENCY slot isn't counted.
+_REQUEST_TIMEOUT = 20.0
+
+
+async def _tagged(key: str, coro, timeout: float = _REQUEST_TIMEOUT) -> tuple[str, object]:
+    """Await coro (each request bounded by timeout) and return (key, result), with any exception as the result."""
+    try:
+        with request_timeout(timeout):
+            return key, await coro
+    except Exception as e:
+        return key, e
+
+
+# Ranked-keyword rows per domain rendered into the prompt
+_PROMPT_KEYWORD_LIMIT = 20
+
+
+def _keyword_value(kw: dict) -> float:
+    """Revenue-relevance score: est. traffic plus volume discounted by position."""
+    rank = kw.get("rank")
+    position = rank if isinstance(rank, int) and rank > 0 else 100
+    return (kw.get("traffic_estimate") or 0) + (kw.get("search_volume") or 0) / position
+
+
+def _top_keywords(kws: list[dict], limit: int = _PROMPT_KEYWORD_LIMIT) -> list[dict]:
+    """Most valuable ranked keywords first, trimmed before they are formatted into the prompt."""
+    return sorted(kws, key=_keyword_value, reverse=True)[:limit]
+
 
 async def run_seo_research_agent(
     client: anthropic.AsyncAnthropic,
@@ -169,7 +212,9 @@ async def run_seo_research_agent(
     # Parse competitors
     competitors = []
     if competitor_str:
-        competitors = [d.strip() for d in competitor_str.replace("\n", ",").split(",") if d.strip()]
+        competitors = list(dict.fromkeys(
+            d.strip() for d in competitor_str.replace("\n", ",").split(",") if d.strip()
+        ))
 
     # Build comprehensive keyword seeds
     commercial_seeds = build_service_keyword_seeds(service, city, 10)
@@ -183,67 +228,77 @@ async def run_seo_research_agent(
         f"emergency {service} {city}",
         f"{service} reviews {city}",
     ]
-    all_seeds = commercial_seeds + informational_seeds
+    # Order-preserving dedupe — each duplicate seed is a billed DataForSEO row
+    all_seeds = list(dict.fromkeys(commercial_seeds + informational_seeds))
 
+    # Phase 2 only needs the seeds and the user-supplied competitors, not any
+    # Phase 1 result, so both batches go out together and report as they land.
     yield "> Phase 1: Pulling domain rankings + competitor landscape...\n\n"
-
-    # Phase 1: Domain intelligence + competitor discovery
-    phase1_tasks = [
-        get_domain_ranked_keywords(domain, location_name, 30),
-        get_domain_rank_overview(domain, location_name),
-        get_backlink_summary(domain),
-        research_competitors(f"{service} {city}", location_name, 5, 5),
-    ]
-
-    # Also get competitor domain overviews
-    for comp in competitors[:3]:
-        phase1_tasks.append(get_domain_rank_overview(comp, location_name))
-
-    phase1_results = await asyncio.gather(*phase1_tasks, return_exceptions=True)
-
-    ranked_kws = phase1_results[0] if not isinstance(phase1_results[0], Exception) else []
-    domain_overview = phase1_results[1] if not isinstance(phase1_results[1], Exception) else {}
-    backlink_summary = phase1_results[2] if not isinstance(phase1_results[2], Exception) else {}
-    serp_competitors = phase1_results[3] if not isinstance(phase1_results[3], Exception) else {}
-
-    comp_overviews = []
-    for i, comp in enumerate(competitors[:3]):
-        idx = 4 + i
-        if idx < len(phase1_results) and not isinstance(phase1_results[idx], Exception):
-            comp_overviews.append(phase1_results[idx])
-
     yield "> Phase 2: Keyword volumes, difficulty, AI overview analysis, trends...\n\n"
 
-    # Phase 2: Keyword intelligence
-    phase2_tasks = [
-        get_keyword_search_volumes(all_seeds, location_name),
-        get_bulk_keyword_difficulty(all_seeds, location_name),
-        get_ai_search_landscape(all_seeds[:8], location_name),
-        get_keyword_trends(commercial_seeds[:5], location_name),
-    ]
-
-    # Get competitor ranked keywords for gap analysis
+    # key → (progress label, coroutine, fallback on failure)
+    fetches = {
+        # Phase 1: Domain intelligence + competitor discovery
+        "ranked_kws": ("Domain rankings", get_domain_ranked_keywords(domain, location_name, 30), []),
+        # Client + up to 3 competitor overviews in a single DataForSEO request
+        "overviews": (
+            "Domain overviews",
+            get_bulk_domain_rank_overview([domain, *competitors[:3]], location_name),
+            {},
+        ),
+        "backlinks": ("Backlink summary", get_backlink_summary(domain), {}),
+        "serp_competitors": (
+            "SERP competitor landscape",
+            research_competitors(f"{service} {city}", location_name, 5, 5),
+            {},
+        ),
+        # Phase 2: Keyword intelligence
+        "volumes": ("Keyword volumes", get_keyword_search_volumes(all_seeds, location_name), []),
+        "difficulty": ("Keyword difficulty", get_bulk_keyword_difficulty(all_seeds, location_name), []),
+        "ai_landscape": ("AI overview analysis", get_ai_search_landscape(all_seeds[:8], location_name), []),
+        "trends": ("Keyword trends", get_keyword_trends(commercial_seeds[:5], location_name), []),
+    }
+    # Competitor ranked keywords for gap analysis
     for comp in competitors[:2]:
-        phase2_tasks.append(get_domain_ranked_keywords(comp, location_name, 20))
-
-    phase2_results = await asyncio.gather(*phase2_tasks, return_exceptions=True)
-
-    volumes = phase2_results[0] if not isinstance(phase2_results[0], Exception) else []
-    difficulty = phase2_results[1] if not isinstance(phase2_results[1], Exception) else []
-    ai_landscape = phase2_results[2] if not isinstance(phase2_results[2], Exception) else []
-    trends = phase2_results[3] if not isinstance(phase2_results[3], Exception) else []
+        fetches[f"keywords:{comp}"] = (
+            f"Ranked keywords for {comp}", get_domain_ranked_keywords(comp, location_name, 20), None,
+        )
 
-    comp_keywords = []
-    for i in range(len(competitors[:2])):
-        idx = 4 + i
-        if idx < len(phase2_results) and not isinstance(phase2_results[idx], Exception):
-            comp_keywords.append({
-                "domain": competitors[i],
-                "keywords": phase2_results[idx],
-            })
+    results: dict = {}
+    tasks = [asyncio.create_task(_tagged(key, coro)) for key, (_, coro, _) in fetches.items()]
+    # Fetches still in flight are cancelled if the client disconnects at a yield
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            key, result = await next_done
+            label, _, fallback = fetches[key]
+            if isinstance(result, Exception):
+                results[key] = fallback
+                yield f"> ✗ {label} unavailable\n\n"
+            else:
+                results[key] = result
+                yield f"> ✓ {label}\n\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    ranked_kws = results["ranked_kws"]
+    overviews = results["overviews"]
+    domain_overview = overviews.get(domain, {})
+    backlink_summary = results["backlinks"]
+    serp_competitors = results["serp_competitors"]
+    volumes = results["volumes"]
+    difficulty = results["difficulty"]
+    ai_landscape = results["ai_landscape"]
+    trends = results["trends"]
+
+    comp_overviews = [overviews[comp] for comp in competitors[:3] if comp in overviews]
+    comp_keywords = [
+        {"domain": comp, "keywords": results[f"keywords:{comp}"]}
+        for comp in competitors[:2]
+        if results[f"keywords:{comp}"] is not None
+    ]
 
     yield "> Data collection complete — generating strategy report with Claude Opus...\n\n"
-    yield "---\n\n"
 
     # Build comprehensive data context
     data_sections = [
@@ -261,7 +316,7 @@ async def run_seo_research_agent(
 
     # Current ranked keywords
     if ranked_kws:
-        data_sections.append(format_domain_ranked_keywords(ranked_kws))
+        data_sections.append(format_domain_ranked_keywords(_top_keywords(ranked_kws)))
 
     # Backlink context
     if backlink_summary:
@@ -298,45 +353,66 @@ async def run_seo_research_agent(
         for ck in comp_keywords:
             data_sections.append(
                 f"## COMPETITOR KEYWORDS — {ck['domain']}\n" +
-                format_domain_ranked_keywords(ck["keywords"])
+                format_domain_ranked_keywords(_top_keywords(ck["keywords"]))
             )
 
     # Competitor domain overviews
     if comp_overviews:
-        comp_section = "## COMPETITOR DOMAIN OVERVIEWS\n"
-        for co in comp_overviews:
-            comp_section += (
-                f"  {co.get('domain', '?')}: "
-                f"{co.get('keywords', 0):,} keywords, "
-                f"~{co.get('etv', 0):,.0f} traffic, "
-                f"${co.get('etv_cost', 0):,.0f}/mo value\n"
+        rows = [
+            (co.get("domain", "?"), co.get("keywords", 0), co.get("etv", 0), co.get("etv_cost", 0))
+            for co in comp_overviews
+        ]
+        data_sections.append(
+            "## COMPETITOR DOMAIN OVERVIEWS\n"
+            + "".join(
+                f"  {d}: {k:,} keywords, ~{e:,.0f} traffic, ${c:,.0f}/mo value\n"
+                for d, k, e, c in rows
             )
-        data_sections.append(comp_section)
+        )
 
     if notes:
         data_sections.append(f"\n## ADDITIONAL CONTEXT\n{notes}")
 
-    if strategy_context and strategy_context.strip():
-        data_sections.append(f"\n## STRATEGY DIRECTION\n{strategy_context.strip()}")
+    yield f"> Prompt ready — {len(data_sections)} data sections\n\n"
+    yield "---\n\n"
 
-    user_prompt = (
+    prompt_intro = (
         f"Generate a comprehensive SEO Content Strategy & Research Report for {client_name} "
         f"({domain}), a {service} business serving {location}.\n\n"
         f"Use ALL of the following research data to produce your analysis and recommendations. "
         f"Every recommendation must be grounded in real data — cite specific volumes, difficulty "
         f"scores, and competitor positions.\n\n"
-        + "\n\n".join(data_sections)
-        + "\n\nWrite the complete strategy report now. Start with the title and executive summary. "
+    )
+    prompt_outro = (
+        "\n\nWrite the complete strategy report now. Start with the title and executive summary. "
         "Your content roadmap should include specific recommendations for location pages, "
         "service pages, blog posts, comparison posts, cost guides, and best-in-city posts."
     )
 
+    # Per-client direction rides in an uncached system block after the static prompt
+    appendix = (
+        f"## STRATEGY DIRECTION\n{strategy_context.strip()}"
+        if strategy_context and strategy_context.strip() else ""
+    )
+
+    # Drop the largest data sections (never CLIENT INFO) until the prompt fits the context window
+    budget = await user_prompt_budget(client, _MODEL, STATIC_SYSTEM_PROMPT, _MAX_TOKENS, appendix)
+    data_text = "\n\n".join(data_sections)
+    while len(data_sections) > 1 and estimate_tokens(prompt_intro + data_text + prompt_outro) > budget:
+        largest = max(range(1, len(data_sections)), key=lambda i: len(data_sections[i]))
+        dropped = data_sections.pop(largest)
+        logger.warning("%s prompt over budget — dropped section %r", __name__, dropped.lstrip()[:60])
+        data_text = "\n\n".join(data_sections)
+
+    user_prompt = prompt_intro + data_text + prompt_outro
+
     async with client.messages.stream(
-        model="claude-sonnet-4-6",
-        max_tokens=20000,
+        model=_MODEL,
+        max_tokens=_MAX_TOKENS,
         thinking={"type": "enabled", "budget_tokens": 8000},
-        system=SYSTEM_PROMPT,
+        system=system_blocks(_SYSTEM_BLOCKS, appendix),
         messages=[{"role": "user", "content": user_prompt}],
     ) as stream:
         async for text in stream.text_stream:
             yield text
+        log_cache_usage(__name__, (await stream.get_final_message()).usage)
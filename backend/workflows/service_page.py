@@ -5,32 +5,53 @@ a home service business — targeting high-intent "[service] [city]" keywords
 and built to rank locally and convert at 8%+.
 """
 
+import asyncio
+import logging
 import re
 import anthropic
-from typing import AsyncGenerator
-
-
-def _clean_content(text: str) -> str:
-    """Remove AI writing patterns: em dashes and colon headlines."""
-    # Fix bullet format: **Bold** — description → **Bold.** Description
-    text = re.sub(r'\*\*([^*]+)\*\*\s*—\s*', r'**\1.** ', text)
-    # Fix sentence em dashes: word — word → word, word
-    text = re.sub(r'(\w)\s*—\s*(\w)', r'\1, \2', text)
-    # Clean up remaining em dashes
-    text = text.replace(' — ', ', ')
-    text = text.replace(' —\n', '.\n')
-    text = text.replace(' —', ',')
-    text = text.replace('— ', ', ')
-    text = text.replace('—', ', ')
-    # Fix colon headlines: "## Label: Rest" → "## Rest in Label" (short labels ≤4 words)
-    text = re.sub(
-        r'^(#{2,3})\s+([A-Za-z][A-Za-z\s,]+?):\s+(.+)$',
-        lambda m: f"{m.group(1)} {m.group(3)} in {m.group(2)}" if len(m.group(2).split()) <= 4 else f"{m.group(1)} {m.group(3)}",
-        text, flags=re.MULTILINE
-    )
-    return text
-
-SYSTEM_PROMPT = """You are a conversion copywriter and local SEO specialist writing service pages for home service businesses under the ProofPilot agency.
+from typing import AsyncGenerator, Optional
+
+from utils.anthropic_client import resolve_client
+from utils.workflow_helpers import (
+    CleanSplitter, cached_block, clean_content, input_value, opt_block, opt_line,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# An 800–1,200 word page is ~1,800 output tokens; 3,000 leaves room for markdown
+# and the FAQ. max_tokens covers thinking plus text.
+_THINKING_BUDGET = 3000
+_MAX_TOKENS = _THINKING_BUDGET + 3000
+
+# Cleanup is a few microseconds per streamed line, far cheaper than a thread
+# hop; only unusually large flushes are worth moving off the event loop.
+_CLEAN_OFFLOAD_CHARS = 20_000
+
+
+async def _clean(text: str) -> str:
+    """clean_content, run in a worker thread when text is large enough to stall the loop."""
+    if len(text) < _CLEAN_OFFLOAD_CHARS:
+        return clean_content(text)
+    return await asyncio.to_thread(clean_content, text)
+
+
+# Words the prompt bans outright. The rule line is rendered once into SYSTEM_PROMPT
+# (tuple, not set, so the cached prompt text is byte-stable across processes) and
+# the regex flags any that still slip through, so the prompt list can be trimmed
+# against real output later.
+_BANNED_WORDS = (
+    "utilize", "leverage", "seamless", "cutting-edge", "world-class", "furthermore",
+    "hence", "moreover", "game-changer", "unlock", "boost", "powerful", "exciting",
+    "groundbreaking", "remarkable", "ever-evolving", "landscape", "testament", "pivotal",
+    "harness", "craft", "crafting", "delve", "embark", "unveil", "intricate", "illuminate",
+)
+_BANNED_RULE = f"- **Never use these words:** {', '.join(_BANNED_WORDS)}."
+_BANNED_WORDS_RE = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, _BANNED_WORDS)) + r")\b", re.IGNORECASE,
+)
+
+SYSTEM_PROMPT = f"""You are a conversion copywriter and local SEO specialist writing service pages for home service businesses under the ProofPilot agency.
 
 These are money pages. They rank for "[service] [city]" searches AND convert visitors into booked jobs. A service page that only ranks is useless. A service page that only converts but doesn't rank is equally useless. You write both at once.
 
@@ -70,7 +91,7 @@ These are money pages. They rank for "[service] [city]" searches AND convert vis
 - **No semicolons.**
 - **No "not just X, but also Y"** or "not only X, but Y" constructions.
 - **No filler words:** very, really, just, actually, basically, certainly, probably.
-- **Never use these words:** utilize, leverage, seamless, cutting-edge, world-class, furthermore, hence, moreover, game-changer, unlock, boost, powerful, exciting, groundbreaking, remarkable, ever-evolving, landscape, testament, pivotal, harness, craft, crafting, delve, embark, unveil, intricate, illuminate.
+{_BANNED_RULE}
 - **No generalizations.** Every claim must be specific.
 - **No clichés.**
 
@@ -79,9 +100,19 @@ Clean markdown: # H1, ## H2 section headers, **bold** for key claims and warning
 
 Do NOT write any preamble or explanation. Start the output immediately with the # H1."""
 
+_SYSTEM_BLOCKS = [cached_block(SYSTEM_PROMPT)]
+
+# Fixed rules lead the user turn so they extend the cached prefix; the
+# per-client details follow in a second, uncached block.
+_USER_RULES_BLOCK = cached_block(
+    "BEFORE YOU WRITE ANYTHING — commit to these two rules:\n"
+    "1. ZERO EM DASHES (—) in your entire response. Not one. Use a comma or start a new sentence instead.\n"
+    "2. ZERO COLONS IN ANY H2 OR H3 HEADLINE. Headlines must be natural phrases. Wrong: 'Our Process: What to Expect' / Right: 'What to Expect When You Call'. Read every headline before writing it."
+)
+
 
 async def run_service_page(
-    client: anthropic.AsyncAnthropic,
+    client: Optional[anthropic.AsyncAnthropic],
     inputs: dict,
     strategy_context: str,
     client_name: str,
@@ -96,68 +127,55 @@ async def run_service_page(
         differentiators  what makes this business stand out (optional)
         price_range      e.g. "$1,200–$3,500 depending on panel size" (optional)
         notes            anything specific to emphasize (optional)
+
+    client may be None, in which case the shared pooled client is used.
     """
-    business_type    = inputs.get("business_type", "home service business").strip()
-    service          = inputs.get("service", "").strip()
-    location         = inputs.get("location", "").strip()
-    differentiators  = inputs.get("differentiators", "").strip()
-    price_range      = inputs.get("price_range", "").strip()
-    notes            = inputs.get("notes", "").strip()
+    client = resolve_client(client)
+    business_type    = input_value(inputs, "business_type", "home service business")
+    service          = input_value(inputs, "service")
+    location         = input_value(inputs, "location")
+    differentiators  = input_value(inputs, "differentiators")
+    price_range      = input_value(inputs, "price_range")
+    notes            = input_value(inputs, "notes")
+
+    if not service or not location:
+        yield "**Error:** Service and location are both required.\n"
+        return
 
     yield f"> Generating service page for **{client_name}**...\n\n"
 
     # ── Build the user prompt ──────────────────────────────
-    lines = [
-        f"Write a conversion-optimized service page for **{client_name}**, a {business_type} serving {location}.",
-        "",
-        f"**Service this page is for:** {service}",
-        f"**Primary keyword to target:** {service} in {location}",
-    ]
-
-    if differentiators:
-        lines.append(f"**What sets this business apart:** {differentiators}")
-
-    if price_range:
-        lines.append(f"**Price range to feature:** {price_range}")
-
-    if notes:
-        lines += [
-            "",
-            "**Specific emphasis and context:**",
-            f"{notes}",
-        ]
-
-    if strategy_context and strategy_context.strip():
-        lines += [
-            "",
-            "**Strategy direction from account manager — follow this:**",
-            f"{strategy_context.strip()}",
-        ]
-
-    lines += [
-        "",
-        "Write the complete service page now. Start immediately with the # H1. No preamble.",
-        "",
-        "BEFORE YOU WRITE ANYTHING — commit to these two rules:",
-        "1. ZERO EM DASHES (—) in your entire response. Not one. Use a comma or start a new sentence instead.",
-        "2. ZERO COLONS IN ANY H2 OR H3 HEADLINE. Headlines must be natural phrases. Wrong: 'Our Process: What to Expect' / Right: 'What to Expect When You Call'. Read every headline before writing it.",
-    ]
-
-    user_prompt = "\n".join(lines)
-
-    # ── Generate from Claude (buffered for post-processing) ────────────────
-    chunks: list[str] = []
+    strategy = strategy_context.strip() if strategy_context else ""
+    user_prompt = f"""Write a conversion-optimized service page for **{client_name}**, a {business_type} serving {location}.
+
+**Service this page is for:** {service}
+**Primary keyword to target:** {service} in {location}{opt_line("What sets this business apart", differentiators)}{opt_line("Price range to feature", price_range)}{opt_block("Specific emphasis and context:", notes)}{opt_block("Strategy direction from account manager — follow this:", strategy)}
+
+Write the complete service page now. Start immediately with the # H1. No preamble."""
+
+    # ── Generate from Claude, cleaning complete lines as they arrive ───────
+    splitter = CleanSplitter()
+    banned_hits: list[str] = []
     async with client.messages.stream(
         model="claude-sonnet-4-6",
-        max_tokens=10000,
-        thinking={"type": "enabled", "budget_tokens": 5000},
-        system=SYSTEM_PROMPT,
-        messages=[{"role": "user", "content": user_prompt}],
+        max_tokens=_MAX_TOKENS,
+        thinking={"type": "enabled", "budget_tokens": _THINKING_BUDGET},
+        system=_SYSTEM_BLOCKS,
+        messages=[{"role": "user", "content": [_USER_RULES_BLOCK, {"type": "text", "text": user_prompt}]}],
     ) as stream:
         async for text in stream.text_stream:
-            chunks.append(text)
-
-    # ── Post-process to remove AI writing patterns ──────────────────────
-    raw = "".join(chunks)
-    cleaned = _clean_content(raw)
-    yield cleaned
+            ready = splitter.feed(text)
+            if ready:
+                cleaned = await _clean(ready)
+                banned_hits += _BANNED_WORDS_RE.findall(cleaned)
+                yield cleaned
+
+    # ── Post-process the tail ───────────────────────────────────────────
+    tail = splitter.flush()
+    if tail:
+        cleaned = await _clean(tail)
+        banned_hits += _BANNED_WORDS_RE.findall(cleaned)
+        yield cleaned
+
+    if banned_hits:
+        logger.info("%s banned words in output: %s", __name__, ", ".join(sorted(set(banned_hits))))
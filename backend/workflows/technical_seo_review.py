@@ -14,7 +14,10 @@ inputs keys:
     notes         — additional context (optional)
 """
 import anthropic
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
+
+from utils.anthropic_client import resolve_client
+from utils.workflow_helpers import cached_block, coalesce_text, input_value, opt_block
 
 SYSTEM_PROMPT = """You are ProofPilot's Technical SEO Specialist. You produce strategic technical SEO audits and generate ready-to-paste JSON-LD schema markup for home service businesses. Your output is immediately actionable — every schema block is valid JSON, every recommendation is specific.
 
@@ -368,62 +371,68 @@ On [Platform]:
 - Be platform-specific in all recommendations — a WordPress fix is different from a Shopify fix
 - If the business type has a specific schema.org subtype (Electrician, Plumber, HVACBusiness), always use it instead of generic LocalBusiness"""
 
+_SYSTEM_BLOCKS = [cached_block(SYSTEM_PROMPT)]
+
+# Fixed task instructions lead the user turn so they extend the cached
+# prefix; the per-client details follow in a second, uncached block.
+_USER_TASK_BLOCK = cached_block(
+    "Generate a full technical SEO review and schema implementation guide for the business below. "
+    "Include all schema templates with real placeholder values filled in for this business type "
+    "and location. Every JSON-LD block must be valid and ready to copy-paste."
+)
+
+
+_THINKING_BUDGET = 8000
+
+
+def _max_tokens(page_types: str, known_issues: str) -> int:
+    """
+    Output cap sized to the request: the checklist and action plan plus one
+    JSON-LD section per page type, and room to address known issues.
+    max_tokens covers thinking plus text, capped at the previous 16k.
+    """
+    n_page_types = len([p for p in page_types.split(",") if p.strip()])
+    text_budget = 4000 + 1000 * n_page_types + (1000 if known_issues else 0)
+    return min(_THINKING_BUDGET + text_budget, 16000)
+
+
 
 async def run_technical_seo_review(
-    client: anthropic.AsyncAnthropic,
+    client: Optional[anthropic.AsyncAnthropic],
     inputs: dict,
     strategy_context: str,
     client_name: str,
 ) -> AsyncGenerator[str, None]:
-    domain       = inputs.get("domain", "").strip()
-    platform     = inputs.get("platform", "").strip()
-    business_type= inputs.get("business_type", "").strip()
-    location     = inputs.get("location", "").strip()
-    known_issues = inputs.get("known_issues", "").strip()
-    page_types   = inputs.get("page_types", "homepage, service pages, blog posts").strip()
-    notes        = inputs.get("notes", "").strip()
+    client = resolve_client(client)
+    domain        = input_value(inputs, "domain")
+    platform      = input_value(inputs, "platform")
+    business_type = input_value(inputs, "business_type")
+    location      = input_value(inputs, "location")
+    known_issues  = input_value(inputs, "known_issues")
+    page_types    = input_value(inputs, "page_types", "homepage, service pages, blog posts")
+    notes         = input_value(inputs, "notes")
+
+    if not domain or not platform or not business_type or not location:
+        yield "**Error:** Domain, platform, business type, and location are all required.\n"
+        return
 
     yield f"> Generating technical SEO review for **{client_name}**...\n\n---\n\n"
 
-    lines = [
-        f"Generate a full technical SEO review and schema implementation guide for **{domain}**.",
-        "",
-        f"**Platform/CMS:** {platform}",
-        f"**Business type:** {business_type}",
-        f"**Location:** {location}",
-        f"**Pages needing schema:** {page_types}",
-    ]
-
-    if known_issues:
-        lines += [
-            "",
-            "**Known issues already identified:**",
-            known_issues,
-        ]
-
-    if notes:
-        lines += ["", "**Additional context:**", notes]
-
-    if strategy_context and strategy_context.strip():
-        lines += [
-            "",
-            "**Strategy direction:**",
-            strategy_context.strip(),
-        ]
-
-    lines += [
-        "",
-        "Produce the full technical SEO review now. Include all schema templates with real placeholder values filled in for this business type and location. Every JSON-LD block must be valid and ready to copy-paste.",
-    ]
-
-    user_prompt = "\n".join(lines)
+    strategy = strategy_context.strip() if strategy_context else ""
+    user_prompt = f"""**Domain:** {domain}
+**Platform/CMS:** {platform}
+**Business type:** {business_type}
+**Location:** {location}
+**Pages needing schema:** {page_types}{opt_block("Known issues already identified:", known_issues)}{opt_block("Additional context:", notes)}{opt_block("Strategy direction:", strategy)}
+
+Produce the full technical SEO review for **{domain}** now."""
 
     async with client.messages.stream(
         model="claude-sonnet-4-6",
-        max_tokens=16000,
-        thinking={"type": "enabled", "budget_tokens": 8000},
-        system=SYSTEM_PROMPT,
-        messages=[{"role": "user", "content": user_prompt}],
+        max_tokens=_max_tokens(page_types, known_issues),
+        thinking={"type": "enabled", "budget_tokens": _THINKING_BUDGET},
+        system=_SYSTEM_BLOCKS,
+        messages=[{"role": "user", "content": [_USER_TASK_BLOCK, {"type": "text", "text": user_prompt}]}],
     ) as stream:
-        async for text in stream.text_stream:
+        async for text in coalesce_text(stream.text_stream):
             yield text
@@ -22,19 +22,29 @@ from __future__ import annotations
 
 import os
 import asyncio
+import functools
 import re
-import anthropic
-from typing import AsyncGenerator
+import time
+from types import MappingProxyType
+from typing import TYPE_CHECKING, AsyncGenerator, Optional
 
+from utils.anthropic_client import resolve_client
+from utils.http_client import request_timeout
 from utils.searchatlas import sa_call
+from utils.workflow_helpers import coalesce_text, safe
 from utils.dataforseo import (
-    research_competitors,
-    get_competitor_sa_profiles,
+    get_local_pack,
+    get_organic_serp,
+    competitor_domains,
+    get_competitor_sa_profile,
     format_full_competitor_section,
     get_domain_ranked_keywords,
     format_domain_ranked_keywords,
 )
 
+if TYPE_CHECKING:
+    import anthropic
+
 
 # ── State abbreviation → full name (for DataForSEO location_name) ────────────
 
@@ -54,20 +64,32 @@ _STATE_MAP = {
     "WI": "Wisconsin", "WY": "Wyoming",
 }
 
+# Read-only view keyed by both "AZ" and "az", so the usual inputs resolve
+# without an .upper() call
+_STATE_LOOKUP = MappingProxyType({**{k.lower(): v for k, v in _STATE_MAP.items()}, **_STATE_MAP})
+
+
+_LOCATION_SPLIT_RE = re.compile(r"[,\s]+")
 
+
+@functools.lru_cache(maxsize=1024)
 def _build_location_name(location_raw: str) -> str:
     """
     Convert user input like "Chandler, AZ" or "chandler az" to
     DataForSEO format: "Chandler,Arizona,United States"
     Falls back to the raw input if parsing fails.
     """
-    parts = re.split(r"[,\s]+", location_raw.strip())
-    parts = [p.strip() for p in parts if p.strip()]
+    # The split already consumes whitespace, so only empty edge pieces remain
+    parts = [p for p in _LOCATION_SPLIT_RE.split(location_raw.strip()) if p]
 
     if len(parts) >= 2:
         city = " ".join(parts[:-1]).title()
-        state_input = parts[-1].upper()
-        state_full = _STATE_MAP.get(state_input, state_input.title())
+        state_input = parts[-1]
+        state_full = (
+            _STATE_LOOKUP.get(state_input)
+            or _STATE_LOOKUP.get(state_input.upper())
+            or state_input.title()
+        )
         return f"{city},{state_full},United States"
 
     return location_raw.strip()
@@ -75,15 +97,93 @@ def _build_location_name(location_raw: str) -> str:
 
 # ── Search Atlas data gathering ───────────────────────────────────────────────
 
-async def _gather_sa_data(domain: str) -> dict[str, str]:
-    """Fetch all Search Atlas data for the client domain concurrently."""
+# ── Short-lived result caches ────────────────────────────────────────────────
+# Same-day re-runs (tweaked notes or strategy direction) reuse the data pull:
+# Search Atlas metrics and SERPs move daily at most. Only complete results are
+# stored, so a failed source is always retried on the next run. Competitor SA
+# profiles are Search Atlas data too, so they live per domain under the SA TTL
+# rather than inside the longer-lived SERP entry.
+
+_SA_CACHE_TTL = float(os.environ.get("SA_CACHE_TTL_SECONDS", "3600"))
+_COMPETITOR_CACHE_TTL = float(os.environ.get("COMPETITOR_CACHE_TTL_SECONDS", "86400"))
+_CACHE_MAX_ENTRIES = 512
+
+_sa_cache: dict[str, tuple[float, dict[str, str]]] = {}
+_profile_cache: dict[str, tuple[float, dict[str, str]]] = {}
+_competitor_cache: dict[tuple[str, str], tuple[float, tuple[list, list]]] = {}
+
+
+def _cache_get(cache: dict, key, ttl: float):
+    """Cached value for key if younger than ttl seconds, else None."""
+    hit = cache.get(key)
+    if hit is None or time.monotonic() - hit[0] > ttl:
+        return None
+    return hit[1]
+
+
+def _cache_put(cache: dict, key, value) -> None:
+    """Store value under key, evicting the oldest entry once the cache is full."""
+    cache.pop(key, None)
+    if len(cache) >= _CACHE_MAX_ENTRIES:
+        cache.pop(next(iter(cache)))
+    cache[key] = (time.monotonic(), value)
+
+
+# Per-tool wall-clock cap on the request itself (time queued for a Search
+# Atlas slot isn't counted). httpx's 30s timeout is per read, so one stalled
+# endpoint could otherwise hold the whole audit; the report already treats
+# "Data unavailable" sections as optional.
+_SA_TIMEOUT = 15.0
+
+# Failed calls come back as "Data unavailable: <reason>". The prefix stays
+# readable because the core sections are rendered into the prompt as-is.
+_SA_UNAVAILABLE = "Data unavailable"
+
+# Search Atlas "no data" replies are short notices, so their marker is only
+# looked for in the head of the response, not across a multi-KB payload.
+_SA_EMPTY_SCAN_CHARS = 200
+
+
+def _ok(value: str, empty_marker: str) -> bool:
+    """True if an optional SA section holds real data worth rendering."""
+    return bool(value) and not value.startswith(_SA_UNAVAILABLE) and (
+        empty_marker not in value[:_SA_EMPTY_SCAN_CHARS]
+    )
+
+
+# Cap on the larger SA tables in the prompt. Rows come back sorted by traffic
+# or authority, so the head keeps the rows the report actually cites.
+_SA_SECTION_CHARS = 4000
+
 
-    async def safe_call(tool: str, op: str, params: dict, label: str) -> tuple[str, str]:
+def _truncate(text: str, max_chars: int = _SA_SECTION_CHARS) -> str:
+    """Cut text to max_chars at the last line break, with a marker where it was cut."""
+    if len(text) <= max_chars:
+        return text
+    end = text.rfind("\n", 0, max_chars)
+    if end <= 0:
+        end = max_chars
+    return f"{text[:end]}\n⟨…truncated {len(text) - end:,} chars⟩"
+
+
+async def _gather_sa_data(domain: str) -> dict[str, str]:
+    """Fetch all Search Atlas data for the client domain concurrently (cached per domain)."""
+    cached = _cache_get(_sa_cache, domain, _SA_CACHE_TTL)
+    if cached is not None:
+        return cached
+
+    async def safe_call(
+        tool: str, op: str, params: dict, label: str, timeout: float = _SA_TIMEOUT,
+    ) -> tuple[str, str]:
         try:
-            result = await sa_call(tool, op, params)
+            # Only the request itself is timed, not its wait for a Search Atlas slot
+            with request_timeout(timeout):
+                result = await sa_call(tool, op, params)
             return label, result
+        except TimeoutError:
+            return label, f"{_SA_UNAVAILABLE}: timed out after {timeout:.0f}s"
         except Exception as e:
-            return label, f"Data unavailable: {e}"
+            return label, f"{_SA_UNAVAILABLE}: {e}"
 
     tasks = [
         safe_call(
@@ -120,48 +220,122 @@ async def _gather_sa_data(domain: str) -> dict[str, str]:
             "Site_Explorer_Holistic_Audit_Tool", "get_holistic_seo_pillar_scores",
             {"domain": domain},
             "pillar_scores",
+            timeout=25.0,  # holistic scoring is the slowest SA endpoint
         ),
     ]
 
-    results = await asyncio.gather(*tasks)
-    return dict(results)
+    sa_data = dict(await asyncio.gather(*tasks))
+    if not any(v.startswith(_SA_UNAVAILABLE) for v in sa_data.values()):
+        _cache_put(_sa_cache, domain, sa_data)
+    return sa_data
 
 
 # ── DataForSEO competitor research ───────────────────────────────────────────
 
+async def _competitor_profile(domain: str) -> dict[str, str]:
+    """Search Atlas profile for one competitor domain (cached per domain when complete)."""
+    cached = _cache_get(_profile_cache, domain, _SA_CACHE_TTL)
+    if cached is not None:
+        return cached
+    unavailable = {"domain": domain, "keywords": _SA_UNAVAILABLE, "backlinks": _SA_UNAVAILABLE}
+    profile = await safe(get_competitor_sa_profile(domain), unavailable)
+    # get_competitor_sa_profile reports its own failures in-band
+    if not (profile["keywords"].startswith(_SA_UNAVAILABLE) or profile["backlinks"].startswith(_SA_UNAVAILABLE)):
+        _cache_put(_profile_cache, domain, profile)
+    return profile
+
+
 async def _gather_competitor_data(
     service: str,
     location_name: str,
+    client_domain: str = "",
+    progress: Optional[asyncio.Queue] = None,
 ) -> dict | None:
     """
     Run Google Maps + organic SERP search for the service/location.
-    Returns None if DataForSEO isn't configured.
+    Returns None if DataForSEO isn't configured. The SERPs are cached per
+    (service, location); competitor profiles per domain.
+
+    The client's own domain often ranks in its own SERP; it stays in the Maps /
+    organic results but gets no competitor SA profile, since _gather_sa_data
+    already pulls fuller data for it in the same audit.
+
+    If progress is given, each competitor domain is put on it as soon as its
+    SA profile comes back with data, so the caller can report it mid-wait.
     """
     dfs_login = os.environ.get("DATAFORSEO_LOGIN", "")
     dfs_pass = os.environ.get("DATAFORSEO_PASSWORD", "")
     if not dfs_login or not dfs_pass:
         return None  # Graceful skip — DataForSEO not configured
 
+    own = client_domain.removeprefix("www.")
+    serp_key = (service.lower(), location_name)
+    serp = _cache_get(_competitor_cache, serp_key, _COMPETITOR_CACHE_TTL)
+
     try:
         keyword = f"{service} {location_name.split(',')[0]}"  # e.g. "electrician Chandler"
-        competitors = await research_competitors(
-            keyword=keyword,
-            location_name=location_name,
-            maps_count=5,
-            organic_count=5,
-        )
-
-        # Pull Search Atlas profiles for top competitor domains
-        top_domains = competitors.get("all_domains", [])[:5]
-        sa_profiles = await get_competitor_sa_profiles(top_domains) if top_domains else []
-        competitors["sa_profiles"] = sa_profiles
-
+        async with asyncio.TaskGroup() as tg:
+            if serp is None:
+                maps_task = tg.create_task(safe(get_local_pack(keyword, location_name, 5), []))
+                organic_task = tg.create_task(safe(get_organic_serp(keyword, location_name, 5), []))
+
+            def start_profile(d: str) -> asyncio.Task:
+                task = tg.create_task(_competitor_profile(d))
+                if progress is not None:
+                    def report(t: asyncio.Task) -> None:
+                        if not t.cancelled() and not t.result()["keywords"].startswith(_SA_UNAVAILABLE):
+                            progress.put_nowait(d)
+                    task.add_done_callback(report)
+                return task
+
+            # Maps domains lead the competitor list, so their Search Atlas
+            # profiles start while the organic SERP is still in flight.
+            if serp is None:
+                maps = await maps_task
+            else:
+                maps, organic = serp
+            maps_domains = [d for d in competitor_domains(maps) if d != own][:5]
+            profile_tasks = {d: start_profile(d) for d in maps_domains}
+            if serp is None:
+                organic = await organic_task
+            all_domains = competitor_domains(maps + organic)
+            profile_domains = [d for d in all_domains if d != own][:5]
+            for d in profile_domains:
+                if d not in profile_tasks:
+                    profile_tasks[d] = start_profile(d)
+
+        competitors = {
+            "maps": maps,
+            "organic": organic,
+            "all_domains": all_domains[:8],
+            "keyword": keyword,
+            "location": location_name,
+            "sa_profiles": [profile_tasks[d].result() for d in profile_domains],
+        }
+        if serp is None and maps and organic:
+            _cache_put(_competitor_cache, serp_key, (maps, organic))
         return competitors
 
     except Exception as e:
         return {"error": str(e), "maps": [], "organic": [], "sa_profiles": [], "all_domains": []}
 
 
+# (expires_at, iso_date): the audit date only changes at local midnight
+_TODAY_CACHE: tuple[float, str] = (0.0, "")
+
+
+def _today_iso() -> str:
+    """Today's local date as YYYY-MM-DD, recomputed once per day."""
+    global _TODAY_CACHE
+    if time.time() >= _TODAY_CACHE[0]:
+        from datetime import date, datetime, time as dt_time, timedelta
+
+        today = date.today()
+        midnight = datetime.combine(today + timedelta(days=1), dt_time.min).timestamp()
+        _TODAY_CACHE = (midnight, today.isoformat())
+    return _TODAY_CACHE[1]
+
+
 # ── System prompt ─────────────────────────────────────────────────────────────
 
 SYSTEM_PROMPT = """You are a senior SEO strategist at ProofPilot, a results-driven digital marketing agency.
@@ -199,7 +373,7 @@ Do NOT write any preamble or meta-commentary. Start the report immediately with
 # ── Main workflow ─────────────────────────────────────────────────────────────
 
 async def run_website_seo_audit(
-    client: anthropic.AsyncAnthropic,
+    client: Optional[anthropic.AsyncAnthropic],
     inputs: dict,
     strategy_context: str,
     client_name: str,
@@ -212,7 +386,10 @@ async def run_website_seo_audit(
         service   — e.g. "electrician"
         location  — e.g. "Chandler, AZ"
         notes     — optional focus areas
+
+    client may be None, in which case the shared pooled client is used.
     """
+    client = resolve_client(client)
     domain = inputs.get("domain", "").strip().lower()
     if not domain:
         yield "Error: No domain provided."
@@ -246,59 +423,81 @@ async def run_website_seo_audit(
         except Exception:
             return []
 
-    sa_task      = _gather_sa_data(domain)
-    dfs_task     = _gather_competitor_data(service, location_name) if (service and location_name) else _no_competitor_data()
-    ranked_task  = _gather_ranked_keywords()
+    profiles_ready: asyncio.Queue[str] = asyncio.Queue()
+    sa_task      = asyncio.create_task(_gather_sa_data(domain))
+    dfs_task     = asyncio.create_task(_gather_competitor_data(service, location_name, domain, profiles_ready) if (service and location_name) else _no_competitor_data())
+    ranked_task  = asyncio.create_task(_gather_ranked_keywords())
 
-    sa_data, competitor_data, ranked_keywords = await asyncio.gather(sa_task, dfs_task, ranked_task)
+    # Report SA as soon as it lands rather than going quiet until the slower
+    # DataForSEO calls finish; the tasks are cancelled if the client disconnects.
+    try:
+        sa_data = await sa_task
+        if not (dfs_task.done() and ranked_task.done()):
+            yield "> Search Atlas data ready — waiting on DataForSEO...\n\n"
+
+        # Competitor profiles land one by one over the DataForSEO tail
+        while not dfs_task.done():
+            next_ready = asyncio.ensure_future(profiles_ready.get())
+            try:
+                await asyncio.wait((next_ready, dfs_task), return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                next_ready.cancel()  # no-op once a domain has been taken
+            if next_ready.done():
+                yield f"> Competitor profile for **{next_ready.result()}** ready\n\n"
+        # Profiles that landed alongside the final one are still queued
+        while not profiles_ready.empty():
+            yield f"> Competitor profile for **{profiles_ready.get_nowait()}** ready\n\n"
+
+        competitor_data, ranked_keywords = await asyncio.gather(dfs_task, ranked_task)
+    finally:
+        for task in (sa_task, dfs_task, ranked_task):
+            task.cancel()
 
     yield "> Data collected — generating audit with Claude Opus...\n\n"
     yield "---\n\n"
 
     # ── Phase 3: Build context document ───────────────────────────────────
-    today = __import__("datetime").date.today().isoformat()
-
     context_sections = [
         f"## Client: {client_name}",
         f"## Domain: {domain}",
         f"## Primary Service: {service or 'Not specified'}",
         f"## Service Area: {location or 'Not specified'}",
-        f"## Audit Date: {today}",
+        f"## Audit Date: {_today_iso()}",
         "",
         "---",
         "",
         "## ORGANIC KEYWORDS DATA (Search Atlas)",
-        sa_data["organic_keywords"],
+        _truncate(sa_data["organic_keywords"]),
         "",
         "## TOP PERFORMING PAGES (Search Atlas)",
-        sa_data["organic_pages"],
+        _truncate(sa_data["organic_pages"]),
         "",
         "## ORGANIC COMPETITOR OVERLAP (Search Atlas)",
         sa_data["sa_competitors"],
         "",
         "## REFERRING DOMAINS — BACKLINK PROFILE (Search Atlas)",
-        sa_data["referring_domains"],
+        _truncate(sa_data["referring_domains"]),
         "",
         "## TOP BACKLINKS (Search Atlas)",
-        sa_data["top_backlinks"],
+        _truncate(sa_data["top_backlinks"]),
     ]
 
     # Optional SA sections
     pos_dist = sa_data.get("position_distribution", "")
-    if pos_dist and "Data unavailable" not in pos_dist and "No position distribution" not in pos_dist:
-        context_sections += ["", "## POSITION DISTRIBUTION", pos_dist]
+    if _ok(pos_dist, "No position distribution"):
+        context_sections.extend(("", "## POSITION DISTRIBUTION", pos_dist))
 
     pillar = sa_data.get("pillar_scores", "")
-    if pillar and "Data unavailable" not in pillar and "No holistic" not in pillar:
-        context_sections += ["", "## SEO PILLAR SCORES", pillar]
+    if _ok(pillar, "No holistic"):
+        context_sections.extend(("", "## SEO PILLAR SCORES", pillar))
 
     # DataForSEO Labs — domain ranked keywords (cross-reference to SA organic data)
     if ranked_keywords:
-        context_sections += [
+        context_sections.extend((
             "",
             "## DOMAIN RANKED KEYWORDS (DataForSEO Labs)",
             format_domain_ranked_keywords(ranked_keywords),
-        ]
+        ))
 
     # DataForSEO competitor section
     if competitor_data and not competitor_data.get("error"):
@@ -312,20 +511,18 @@ async def run_website_seo_audit(
             organic=organic_results,
             sa_profiles=sa_profiles,
         )
-        context_sections += ["", "---", "", competitor_section]
+        context_sections.extend(("", "---", "", competitor_section))
 
     elif competitor_data and competitor_data.get("error"):
-        context_sections += [
+        context_sections.extend((
             "", "## COMPETITOR RESEARCH",
             f"Competitor SERP lookup failed: {competitor_data['error']}",
-        ]
+        ))
     else:
-        context_sections += [
+        context_sections.extend((
             "", "## COMPETITOR RESEARCH",
             "DataForSEO not configured — competitor SERP data not available for this audit.",
-        ]
-
-    context_doc = "\n".join(context_sections)
+        ))
 
     # ── Phase 4: Build Claude prompt ──────────────────────────────────────
     has_competitor_data = bool(
@@ -339,17 +536,19 @@ async def run_website_seo_audit(
         "",
         "Here is the live data pulled from Search Atlas and Google:",
         "",
-        context_doc,
+        # Spliced in rather than pre-joined, so the (often tens-of-KB) SA
+        # payloads are copied into a string once, by the final join
+        *context_sections,
     ]
 
     if notes:
-        prompt_lines += ["", "**Additional context from the agency:**", notes]
+        prompt_lines.extend(("", "**Additional context from the agency:**", notes))
 
     if strategy_context and strategy_context.strip():
-        prompt_lines += [
+        prompt_lines.extend((
             "", "**Strategic direction — factor this into recommendations:**",
             strategy_context.strip(),
-        ]
+        ))
 
     # Report structure
     report_sections = [
@@ -359,34 +558,34 @@ async def run_website_seo_audit(
     ]
 
     if has_competitor_data:
-        report_sections += [
+        report_sections.extend((
             "4. Competitor Landscape — Google Maps + Organic (name competitors explicitly, show "
             "exactly what they're doing that this client isn't — reviews, rankings, page count, "
             "backlinks. Make it concrete and urgent.)",
             "5. Keyword Gap Analysis (specific keywords competitors rank for that this client "
             "doesn't — flag the revenue impact)",
-        ]
+        ))
     else:
-        report_sections += [
+        report_sections.extend((
             "4. Competitive Landscape (who they compete with based on Search Atlas overlap data)",
             "5. Keyword Gap Analysis (keywords they should be targeting based on their market)",
-        ]
+        ))
 
-    report_sections += [
+    report_sections.extend((
         "6. Backlink Profile (authority score, referring domains, quality assessment)",
         "7. Priority Recommendations (top 5-7 actions ranked by revenue impact — each with "
         "a specific, actionable next step)",
         "8. 90-Day Action Plan (Month 1 / Month 2 / Month 3 phased roadmap)",
-    ]
+    ))
 
-    prompt_lines += [
+    prompt_lines.extend((
         "",
         "Write the full audit report now. Structure it as:",
         *[f"   {s}" for s in report_sections],
         "",
         "Be specific — use the actual keywords, domains, competitor names, and numbers from "
         "the data. Start immediately with the H1 title.",
-    ]
+    ))
 
     user_prompt = "\n".join(prompt_lines)
 
@@ -398,5 +597,5 @@ async def run_website_seo_audit(
         system=SYSTEM_PROMPT,
         messages=[{"role": "user", "content": user_prompt}],
     ) as stream:
-        async for text in stream.text_stream:
+        async for text in coalesce_text(stream.text_stream):
             yield text